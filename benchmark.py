@@ -0,0 +1,590 @@
+import os
+import sys
+import json
+import time
+import gzip
+import hashlib
+import runpy
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.server
+from urllib.parse import urlparse, parse_qs
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spotify-to-youtube-music.py")
+
+# Stand-in services only ever listen on the loopback interface
+HOST = "127.0.0.1"
+
+def percentile(values, fraction):
+    """Return the given percentile (0-1) of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class Recorder:
+    """Collects request counts, injected failures and latency for each endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.first = {}
+        self.bytes = {}
+
+    def record(self, endpoint, status, elapsed, size=0):
+        with self.lock:
+            self.first.setdefault(endpoint, time.monotonic() - elapsed)
+            self.bytes[endpoint] = self.bytes.get(endpoint, 0) + size
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            counts = self.statuses.setdefault(endpoint, {})
+            counts[status] = counts.get(status, 0) + 1
+
+    def report(self):
+        with self.lock:
+            return {
+                endpoint: {
+                    'requests': len(latencies),
+                    'statuses': {str(status): count for status, count in self.statuses[endpoint].items()},
+                    'p50_ms': percentile(latencies, 0.50) * 1000,
+                    'p95_ms': percentile(latencies, 0.95) * 1000,
+                    'bytes': self.bytes[endpoint],
+                }
+                for endpoint, latencies in self.latencies.items()
+            }
+
+def parse_fields(text):
+    """Parse a Spotify `fields` filter such as "total,items(track(name,album.name))" into a nested
+    dict mapping each field to its subfields, or to None for the whole value."""
+    position = 0
+
+    def add(result, name, subfields):
+        *parents, last = name.split(".")
+        for parent in parents:
+            result = result.setdefault(parent, {})
+        result[last] = subfields
+
+    def parse_list():
+        nonlocal position
+        result, name = {}, ""
+        while position < len(text):
+            char = text[position]
+            position += 1
+            if char == "(":
+                add(result, name, parse_list())
+                name = ""
+            elif char == ")":
+                break
+            elif char == ",":
+                if name:
+                    add(result, name, None)
+                name = ""
+            else:
+                name += char
+        if name:
+            add(result, name, None)
+        return result
+
+    return parse_list()
+
+def project(value, fields):
+    """Keep only the given fields (as returned by parse_fields) of a JSON value."""
+    if fields is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {name: project(value[name], subfields) for name, subfields in fields.items() if name in value}
+    return value
+
+# Everything else Spotify sends with a playlist item, which the script never uses
+MARKETS = [a + b for a in "ABCDEFGHIJKLMNOP" for b in "AEIOUXYZ"][:180]
+ALBUM_IMAGES = [{'url': f"https://i.scdn.co/image/ab67616d0000b273{size:040x}", 'height': size, 'width': size} for size in (640, 300, 64)]
+
+class Catalog:
+    """Deterministic fake library: the Spotify playlists and the YouTube Music songs they match."""
+
+    def __init__(self, playlist_sizes, miss_every=50):
+        self.playlists = []
+        self.songs = {}
+
+        song = 0
+        for number, size in enumerate(playlist_sizes):
+            tracks = []
+            for _ in range(size):
+                artist = f"Artist {song % 997}"
+                duration = 150 + song % 120
+                tracks.append({
+                    'added_at': "2024-01-01T00:00:00Z",
+                    'added_by': {'id': "benchmark", 'type': "user", 'uri': "spotify:user:benchmark"},
+                    'is_local': False,
+                    'track': {
+                        'id': f"track{song:017d}",
+                        'name': f"Song {song}",
+                        'artists': [{'name': artist, 'id': f"artist{song % 997:016d}", 'type': "artist",
+                                     'uri': f"spotify:artist:artist{song % 997:016d}",
+                                     'external_urls': {'spotify': f"https://open.spotify.com/artist/artist{song % 997:016d}"}}],
+                        'duration_ms': duration * 1000,
+                        'external_ids': {'isrc': f"BENCH{song:07d}"},
+                        'album': {'name': f"Album {song // 12}", 'album_type': "album", 'images': ALBUM_IMAGES,
+                                  'release_date': "2020-01-01", 'available_markets': MARKETS},
+                        'available_markets': MARKETS,
+                        'disc_number': 1,
+                        'track_number': song % 12 + 1,
+                        'explicit': False,
+                        'popularity': song % 100,
+                        'preview_url': f"https://p.scdn.co/mp3-preview/{song:040x}",
+                        'href': f"https://api.spotify.com/v1/tracks/track{song:017d}",
+                        'uri': f"spotify:track:track{song:017d}",
+                    }
+                })
+
+                # Every `miss_every`th song doesn't exist on YouTube Music
+                if song % miss_every != miss_every - 1:
+                    candidate = {
+                        'videoId': f"vid{song:07d}",
+                        'title': f"Song {song}",
+                        'artists': [{'name': artist}],
+                        'duration_seconds': duration,
+                        'album': {'name': f"Album {song // 12}"},
+                    }
+                    self.songs[f"song {song} {artist.lower()}"] = candidate
+                    self.songs[f"song {song}"] = candidate
+                song += 1
+
+            # The script's connection check searches for "test"
+            self.songs.setdefault("test", next(iter(self.songs.values()), None))
+
+            self.playlists.append({
+                'id': f"bench{number}",
+                'name': f"Benchmark {number} ({size} tracks)",
+                'snapshot_id': "1",
+                'tracks': {'total': size},
+                'items': tracks,
+            })
+
+    def search(self, query, limit):
+        """Return the matching song plus a live version decoy, like a real search would."""
+        candidate = self.songs.get(" ".join(query.lower().split()))
+        if not candidate:
+            return []
+        decoy = dict(candidate, videoId=candidate['videoId'] + "L", title=candidate['title'] + " (Live)",
+                     duration_seconds=candidate['duration_seconds'] + 40)
+        return [decoy, candidate][:limit]
+
+class ServerRateLimit:
+    """Token bucket per service, like a real API's rate limit: requests beyond it get HTTP 429."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.buckets = {}
+
+    def allow(self, service):
+        with self.lock:
+            now = time.monotonic()
+            tokens, updated = self.buckets.get(service, (self.rate, now))
+            # Bursts of up to one second's worth of requests
+            tokens = min(self.rate, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self.buckets[service] = (tokens, now)
+                return False
+            self.buckets[service] = (tokens - 1, now)
+            return True
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the Spotify Web API and YouTube Music calls used by the transfer script."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body are written separately; don't let Nagle delay them
+
+    def log_message(self, format, *args):
+        return
+
+    def send_json(self, status, body, headers=None, etag=False):
+        payload = json.dumps(body).encode()
+        headers = dict(headers or {})
+
+        # Conditional requests, like the Spotify Web API: an unchanged response is a bodyless 304
+        if etag:
+            headers["ETag"] = '"' + hashlib.md5(payload).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                status, payload = 304, b""
+
+        if payload and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+            payload = gzip.compress(payload, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.bytes_sent = len(payload)
+        return status
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def handle_request(self, method):
+        options = self.server.options
+        url = urlparse(self.path)
+        body = self.read_body()
+        endpoint = self.server.route(method, url.path)
+        start_time = time.monotonic()
+        self.bytes_sent = 0
+
+        # Injected latency (+/- 50%), throttling and server errors
+        if options.latency:
+            time.sleep(options.latency * random.uniform(0.5, 1.5))
+
+        service = endpoint.split("_", 1)[0]
+        throttled = self.server.rate_limit and service in ("spotify", "ytmusic") and not self.server.rate_limit.allow(service)
+        roll = random.random()
+        if throttled or (endpoint.startswith(("spotify_", "ytmusic_")) and roll < options.throttle_rate):
+            headers = {"Retry-After": str(options.retry_after)} if options.retry_after is not None else {}
+            self.send_json(429, {'error': "Too Many Requests"}, headers)
+            status = 429
+        elif endpoint.startswith("ytmusic_") and roll < options.throttle_rate + options.error_rate:
+            self.send_json(500, {'error': "Internal Server Error"})
+            status = 500
+        else:
+            status = self.server.respond(self, endpoint, url, body)
+
+        self.server.recorder.record(endpoint, status, time.monotonic() - start_time, self.bytes_sent)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    """Local stand-in for Spotify (accounts and Web API) and YouTube Music."""
+
+    daemon_threads = True
+
+    def __init__(self, catalog, options):
+        super().__init__((HOST, 0), StandInHandler)
+        self.catalog = catalog
+        self.options = options
+        self.recorder = Recorder()
+        self.rate_limit = ServerRateLimit(options.rate_limit) if options.rate_limit else None
+        self.lock = threading.Lock()
+        self.youtube_playlists = {}
+
+    @property
+    def url(self):
+        return f"http://{HOST}:{self.server_port}"
+
+    def route(self, method, path):
+        if path == "/authorize":
+            return "auth_authorize"
+        if path == "/api/token":
+            return "auth_token"
+        if path == "/v1/me/playlists":
+            return "spotify_playlists"
+        if path.startswith("/v1/playlists/") and path.endswith("/tracks"):
+            return "spotify_tracks"
+        if path.startswith("/v1/playlists/"):
+            return "spotify_playlist"
+        if path.startswith("/ytmusic/"):
+            return "ytmusic_" + path.rsplit("/", 1)[1]
+        return "unknown"
+
+    def page(self, items, url, limit_default):
+        query = parse_qs(url.query)
+        limit = int(query.get('limit', [limit_default])[0])
+        offset = int(query.get('offset', [0])[0])
+        page = {'items': items[offset:offset + limit], 'total': len(items), 'limit': limit, 'offset': offset}
+        return project(page, parse_fields(query['fields'][0])) if 'fields' in query else page
+
+    def respond(self, handler, endpoint, url, body):
+        if endpoint == "auth_authorize":
+            # Skip the consent page and send the "browser" straight back with a code
+            redirect_uri = parse_qs(url.query)['redirect_uri'][0]
+            handler.send_response(302)
+            handler.send_header("Location", f"{redirect_uri}?code=benchmark")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return 302
+
+        if endpoint == "auth_token":
+            handler.send_json(200, {'access_token': "benchmark", 'refresh_token': "benchmark", 'expires_in': 3600})
+            return 200
+
+        if endpoint == "spotify_playlists":
+            summaries = [{key: value for key, value in playlist.items() if key != 'items'} for playlist in self.catalog.playlists]
+            return handler.send_json(200, self.page(summaries, url, 20), etag=True)
+
+        if endpoint == "spotify_playlist":
+            playlist_id = url.path.split("/")[3]
+            playlist = next((playlist for playlist in self.catalog.playlists if playlist['id'] == playlist_id), None)
+            if not playlist:
+                handler.send_json(404, {'error': "Not found"})
+                return 404
+            summary = {key: value for key, value in playlist.items() if key != 'items'}
+            query = parse_qs(url.query)
+            return handler.send_json(200, project(summary, parse_fields(query['fields'][0])) if 'fields' in query else summary, etag=True)
+
+        if endpoint == "spotify_tracks":
+            playlist_id = url.path.split("/")[3]
+            playlist = next((playlist for playlist in self.catalog.playlists if playlist['id'] == playlist_id), None)
+            if not playlist:
+                handler.send_json(404, {'error': "Not found"})
+                return 404
+            return handler.send_json(200, self.page(playlist['items'], url, 100), etag=True)
+
+        if endpoint.startswith("ytmusic_"):
+            request = json.loads(body or b"{}")
+            handler.send_json(200, self.ytmusic(endpoint[len("ytmusic_"):], request))
+            return 200
+
+        handler.send_json(404, {'error': "Not found"})
+        return 404
+
+    def ytmusic(self, call, request):
+        if call == "search":
+            return self.catalog.search(request['query'], request.get('limit') or 20)
+
+        with self.lock:
+            if call == "create_playlist":
+                playlist_id = f"PL{len(self.youtube_playlists)}"
+                self.youtube_playlists[playlist_id] = []
+                return playlist_id
+
+            items = self.youtube_playlists.setdefault(request.get('playlistId'), [])
+
+            if call == "add_playlist_items":
+                # Accepted writes don't always land, or land twice, like on the real service
+                for video_id in request['videoIds']:
+                    roll = random.random()
+                    if roll < self.options.drop_rate:
+                        continue
+                    copies = 2 if roll < self.options.drop_rate + self.options.duplicate_rate else 1
+                    for _ in range(copies):
+                        items.append({'videoId': video_id, 'setVideoId': f"{video_id}-{len(items)}"})
+                return {'status': "STATUS_SUCCEEDED", 'playlistEditResults': []}
+            if call == "get_playlist":
+                return {'id': request['playlistId'], 'tracks': list(items), 'trackCount': len(items)}
+            if call == "remove_playlist_items":
+                removed = {video['setVideoId'] for video in request['videos']}
+                items[:] = [item for item in items if item['setVideoId'] not in removed]
+                return "STATUS_SUCCEEDED"
+            if call == "edit_playlist":
+                moved, before = request['moveItem']
+                item = next(item for item in items if item['setVideoId'] == moved)
+                items.remove(item)
+                items.insert(next(i for i, other in enumerate(items) if other['setVideoId'] == before), item)
+                return "STATUS_SUCCEEDED"
+            if call == "delete_playlist":
+                self.youtube_playlists.pop(request['playlistId'], None)
+                return "STATUS_SUCCEEDED"
+
+        return {}
+
+class BenchYTMusic:
+    """Drop-in for ytmusicapi.YTMusic that sends each call to the stand-in server.
+
+    It uses the requests session handed to it, like YTMusic does, so the transfer
+    script's response hooks (Retry-After tracking) see every response.
+    """
+
+    def __init__(self, auth=None, requests_session=None, **kwargs):
+        import requests
+        self.url = os.environ['BENCHMARK_YTMUSIC_URL']
+        self.session = requests_session or requests.Session()
+
+    def _call(self, name, **body):
+        response = self.session.post(f"{self.url}/ytmusic/{name}", json=body)
+        if response.status_code >= 400:
+            # Same message format as ytmusicapi's server errors
+            raise Exception(f"Server returned HTTP {response.status_code}: {response.reason}.\n")
+        return response.json()
+
+    def search(self, query, filter=None, limit=20, **kwargs):
+        return self._call("search", query=query, filter=filter, limit=limit)
+
+    def create_playlist(self, title, description, privacy_status="PRIVATE", **kwargs):
+        return self._call("create_playlist", title=title, description=description, privacy_status=privacy_status)
+
+    def add_playlist_items(self, playlistId, videoIds=None, duplicates=False, **kwargs):
+        return self._call("add_playlist_items", playlistId=playlistId, videoIds=videoIds or [])
+
+    def get_playlist(self, playlistId, limit=100, **kwargs):
+        return self._call("get_playlist", playlistId=playlistId)
+
+    def remove_playlist_items(self, playlistId, videos):
+        return self._call("remove_playlist_items", playlistId=playlistId, videos=videos)
+
+    def edit_playlist(self, playlistId, moveItem=None, **kwargs):
+        return self._call("edit_playlist", playlistId=playlistId, moveItem=moveItem)
+
+    def delete_playlist(self, playlistId):
+        return self._call("delete_playlist", playlistId=playlistId)
+
+def open_in_fake_browser(url):
+    """Stand-in for webbrowser.open: follow the authorize redirect back to the local callback."""
+    import requests
+
+    def visit():
+        try:
+            requests.get(url, timeout=10)
+        except Exception:
+            pass
+
+    threading.Thread(target=visit, daemon=True).start()
+    return True
+
+def run_transfer(script_args):
+    """Run the transfer script's __main__ in this process against the stand-in services."""
+    import types
+    import webbrowser
+
+    module = types.ModuleType("ytmusicapi")
+    module.YTMusic = BenchYTMusic
+    sys.modules["ytmusicapi"] = module
+    webbrowser.open = open_in_fake_browser
+
+    sys.argv = [SCRIPT] + script_args
+    runpy.run_path(SCRIPT, run_name="__main__")
+
+def benchmark(size, options):
+    """Transfer one playlist of `size` tracks through the full script and measure it."""
+    catalog = Catalog([size])
+    server = StandInServer(catalog, options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    workdir = tempfile.mkdtemp(prefix="stym-bench-")
+    with open(os.path.join(workdir, "headers_auth.json"), "w") as f:
+        json.dump({"Cookie": "benchmark", "Authorization": "benchmark"}, f)
+
+    env = dict(
+        os.environ,
+        SPOTIFY_ACCOUNTS_URL=server.url,
+        SPOTIFY_API_URL=f"{server.url}/v1",
+        BENCHMARK_YTMUSIC_URL=server.url,
+    )
+    metrics_log = os.path.join(workdir, "metrics.jsonl")
+    runner = [sys.executable, os.path.abspath(__file__), "run", "--"]
+    command = runner + ["--playlists", "all", "--no-cache",
+                        "--concurrency", str(options.concurrency), "--rate", str(options.rate),
+                        "--metrics-log", metrics_log] + options.script_args
+
+    # Fetch every Spotify page once, unmeasured, so the measured run revalidates a warm response cache
+    if options.warm_spotify_cache:
+        subprocess.run(runner + ["--export-snapshot", os.path.join(workdir, "warm.jsonl")], cwd=workdir, env=env, capture_output=True)
+        server.recorder = Recorder()
+
+    # Fetch from Spotify once, unmeasured, and time only the transfer from the snapshot
+    if options.snapshot:
+        snapshot = os.path.join(workdir, "snapshot.jsonl")
+        subprocess.run(runner + ["--export-snapshot", snapshot], cwd=workdir, env=env, capture_output=True)
+        command += ["--from-snapshot", snapshot]
+        server.recorder = Recorder()
+
+    # Each run is a fresh process so it pays the same startup and authentication cost as a real run
+    start_time = time.monotonic()
+    output = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    elapsed = time.monotonic() - start_time
+    server.shutdown()
+
+    if options.verbose or output.returncode != 0:
+        print(output.stdout)
+        print(output.stderr, file=sys.stderr)
+
+    # The script's own view of where the time went: the summary line at the end of its metrics log
+    script_stages = {}
+    if os.path.exists(metrics_log):
+        with open(metrics_log) as f:
+            for line in f:
+                record = json.loads(line)
+                if 'summary' in record:
+                    script_stages = record['summary']['stages']
+
+    # Startup latency: from launching the script to its first Spotify and YouTube Music requests
+    def first_request(prefix):
+        times = [at for endpoint, at in server.recorder.first.items() if endpoint.startswith(prefix)]
+        return min(times) - start_time if times else None
+
+    added = sum(len(items) for items in server.youtube_playlists.values())
+    unique = sum(len({item['videoId'] for item in items}) for items in server.youtube_playlists.values())
+    return {
+        'tracks': size,
+        'added': added,
+        'duplicates': added - unique,
+        'seconds': elapsed,
+        'tracks_per_second': size / elapsed if elapsed else 0,
+        'exit_code': output.returncode,
+        'first_spotify_request_seconds': first_request(("auth_", "spotify_")),
+        'first_ytmusic_request_seconds': first_request("ytmusic_"),
+        'stages': server.recorder.report(),
+        'script_stages': script_stages,
+    }
+
+def print_report(result):
+    print(f"\n{result['tracks']} tracks: {result['added']} added ({result['duplicates']} duplicates) in {result['seconds']:.2f}s "
+          f"({result['tracks_per_second']:.1f} tracks/s, exit code {result['exit_code']})")
+    startup = [f"{label} after {result[key] * 1000:.0f} ms" for label, key in
+               (("first Spotify request", 'first_spotify_request_seconds'), ("first YouTube Music request", 'first_ytmusic_request_seconds'))
+               if result[key] is not None]
+    if startup:
+        print(f"  Startup: {', '.join(startup)}")
+    print(f"  {'Stage':<30} {'Requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'KB sent':>9}  Statuses")
+    for stage, stats in sorted(result['stages'].items()):
+        statuses = ", ".join(f"{status}: {count}" for status, count in sorted(stats['statuses'].items()))
+        print(f"  {stage:<30} {stats['requests']:>9} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['bytes'] / 1024:>9.1f}  {statuses}")
+
+    if result['script_stages']:
+        print(f"  {'Script stage (summed)':<30} {'Calls':>9} {'Total s':>9} {'p95 ms':>9}")
+        for stage, stats in sorted(result['script_stages'].items(), key=lambda pair: -pair[1]['seconds']):
+            print(f"  {stage:<30} {stats['count']:>9} {stats['seconds']:>9.2f} {stats['p95'] * 1000:>9.1f}")
+
+def main():
+    """Benchmark transfers end to end against local stand-ins for Spotify and YouTube Music."""
+    parser = argparse.ArgumentParser(description="Benchmark the transfer script against local stand-in servers")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated playlist sizes to benchmark (default: 100,1000,10000)")
+    parser.add_argument("--latency", type=float, default=0.05, help="average server latency per request in seconds (default: 0.05)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of YouTube Music requests answered with HTTP 500")
+    parser.add_argument("--rate-limit", type=float, default=None, help="requests per second each stand-in service allows before answering HTTP 429 (default: unlimited)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 429 regardless of the request rate (stress test)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of added tracks silently not stored in the playlist")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="fraction of added tracks silently stored twice")
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with 429 responses (default: none)")
+    parser.add_argument("--concurrency", type=int, default=16, help="parallel searches passed to the script (default: 16)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="starting request rate passed to the script (default: 1000)")
+    parser.add_argument("--warm-spotify-cache", action="store_true", help="fetch the Spotify pages once before the measured run, so it gets 304s for unchanged pages")
+    parser.add_argument("--snapshot", action="store_true", help="export the Spotify side to a snapshot first and only measure the transfer from it")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the transfer script's output")
+    parser.add_argument("script_args", nargs="*", help="extra arguments for the transfer script (after --)")
+
+    # Internal entry point used for each measured run
+    if sys.argv[1:2] == ["run"]:
+        run_transfer(sys.argv[3:] if sys.argv[2:3] == ["--"] else sys.argv[2:])
+        return
+
+    options = parser.parse_args()
+    results = []
+
+    for size in [int(size) for size in options.sizes.split(",")]:
+        result = benchmark(size, options)
+        print_report(result)
+        results.append(result)
+
+    if options.json:
+        with open(options.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nBenchmark cancelled by user")
+        sys.exit(0)
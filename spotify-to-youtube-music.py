@@ -2,97 +2,310 @@ import os
 import sys
 import json
 import time
+import re
 import base64
-import webbrowser
+import random
+import hashlib
+import tempfile
+import argparse
 from urllib.parse import urlencode
-import http.server
-import socketserver
 import threading
-import requests
+import functools
+from array import array
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from difflib import SequenceMatcher
+from concurrent.futures import Future, ThreadPoolExecutor
 
-# Import ytmusicapi with error handling
-try:
-    from ytmusicapi import YTMusic
-except ImportError:
-    print("Error: ytmusicapi is not installed. Install it using: pip install ytmusicapi")
-    sys.exit(1)
-
-print("=" * 60)
-print("Spotify to YouTube Music Playlist Transfer")
-print("=" * 60)
+# requests, ytmusicapi, http.server, webbrowser and sqlite3 are imported where they are
+# first needed, so that e.g. --help or an export don't pay for modules they never use
 
 # Spotify API credentials
 SPOTIFY_CLIENT_ID = 'SPOTIFY_CLIENT_ID'
 SPOTIFY_CLIENT_SECRET = 'SPOTIFY_CLIENT_SECRET'
+SPOTIFY_ACCOUNTS_URL = os.environ.get('SPOTIFY_ACCOUNTS_URL', 'https://accounts.spotify.com')
 
 # OAuth setup
 REDIRECT_PORT = 8888
 REDIRECT_URI = f'http://localhost:{REDIRECT_PORT}/callback'
 AUTH_CODE = None
+AUTH_RECEIVED = threading.Event()
 SERVER = None
+SPOTIFY_SCOPE = 'playlist-read-private playlist-read-collaborative'
+
+# Result of the last YouTube Music credential test, so it isn't repeated on every run
+YTMUSIC_AUTH_CHECK_FILE = ".ytmusic_auth_check.json"
+YTMUSIC_AUTH_CHECK_TTL = 6 * 60 * 60  # Seconds a passed test is trusted before searching again
+
+# Saved Spotify tokens, so later runs skip the browser login
+SPOTIFY_TOKEN_FILE = ".spotify_token.json"
+SPOTIFY_TOKEN_REFRESH_MARGIN = 300  # Refresh the access token when it has less than this many seconds left
+
+# Spotify API settings
+SPOTIFY_API_URL = os.environ.get('SPOTIFY_API_URL', 'https://api.spotify.com/v1')
+SPOTIFY_FETCH_CONCURRENCY = 8  # Number of playlist pages fetched at once
+SPOTIFY_PREFETCH_PAGES = 16    # Pages fetched ahead of the matching stage
+SPOTIFY_SESSION = None
+
+# Only the playlist item fields used for matching are requested
+SPOTIFY_TRACK_FIELDS = "total,items(track(id,name,duration_ms,artists(name),album(name),external_ids(isrc)))"
+
+# Spotify responses are cached with their ETag, so unchanged pages come back as an empty 304
+SPOTIFY_CACHE_FILE = "spotify_cache.db"
+SPOTIFY_CACHE_MAX_ENTRIES = 20000  # Least recently used pages are evicted beyond this
+SPOTIFY_CACHE_EVICT_INTERVAL = 500  # Pages stored between checks for entries to evict
+SPOTIFY_CACHE = None
+SPOTIFY_CACHE_LOCK = threading.Lock()
+
+# YouTube Music matching settings
+SEARCH_CONCURRENCY = 4    # Number of searches allowed in flight at once
+YTMUSIC_RATE_LIMIT = 2.0  # Starting YouTube Music request rate per second (shared by all workers)
+YTMUSIC_RATE_BURST = 4    # Requests that may be sent back-to-back before pacing kicks in
+INSERT_BATCH_SIZE = 50    # Number of tracks added to the playlist per request
+PLAYLIST_CONCURRENCY = 2  # Number of playlists transferred at once in batch mode
+
+# Adaptive rate control: the request rate grows while YouTube Music is healthy and is cut
+# when it starts throttling (additive increase, multiplicative decrease)
+YTMUSIC_MIN_RATE = 0.2      # Requests per second never go below this
+YTMUSIC_MAX_RATE = 10.0     # Requests per second never go above this
+RATE_INCREASE = 0.05        # Added to the rate after each successful request
+RATE_DECREASE = 0.5         # Multiplies the rate after each throttled request
+BACKOFF_BASE = 1.0          # Seconds of backoff after the first throttled or failed attempt
+BACKOFF_MAX = 60.0          # Longest backoff between retries
+YTMUSIC_MAX_RETRIES = 5     # Attempts per request before giving up
+
+# Credential pool for searches (see --credentials)
+YTMUSIC_POOL = None
+YTMUSIC_POOL_MAX_FAILURES = 3   # Failed calls in a row before a credential is quarantined
+YTMUSIC_POOL_QUARANTINE = 300   # Seconds a failing credential is left out of the pool
+
+# Match scoring settings
+MATCH_CANDIDATES = 5               # Search results scored per query
+MATCH_CONFIDENCE_THRESHOLD = 0.75  # Below this score, a fallback search is tried as well
+MATCH_MIN_SCORE = 0.4              # Candidates scoring below this are not added at all
+DURATION_TOLERANCE = 5             # Seconds of length difference that still count as the same recording
+NUMBER_MISMATCH_PENALTY = 0.3      # Subtracted when the titles' numbers differ, e.g. "Part 1" and "Part 2"
+
+# Match cache settings
+MATCH_CACHE_FILE = "match_cache.db"
+MATCH_CACHE_TTL = 30 * 24 * 60 * 60  # Seconds before a cached match is searched again
+MATCH_CACHE_MAX_ENTRIES = 100000     # Least recently used matches are evicted beyond this
+MATCH_CACHE_EVICT_INTERVAL = 1000    # Matches stored between checks for entries to evict
+
+# Local index of the YouTube Music songs seen in search results
+CATALOG_INDEX_FILE = "catalog_index.db"
+CATALOG_INDEX_MAX_ENTRIES = 200000  # Most recently seen songs kept in the index
+CATALOG_INDEX_MIN_SCORE = 0.9       # Local matches scoring below this are searched online anyway
+CATALOG_INDEX = None
+
+# Match service shared by concurrent transfers
+MATCH_SERVICE_MAX_ENTRIES = 50000  # Matches kept in memory, least recently used evicted first
+MATCH_SERVICE_PORT = 8889          # Port of the local match service started with --serve-matches
+
+# Dry-run match report (see --dry-run)
+MATCH_REPORT_FILE = "match_report.json"
 
-# Callback handler for Spotify OAuth
-class CallbackHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        global AUTH_CODE, SERVER
+# Job server (see --serve-jobs)
+JOB_QUEUE_FILE = "jobs.db"
+JOB_SERVER_PORT = 8890     # Port of the job API
+JOB_WORKERS = 2            # Worker processes running transfers
+JOB_POLL_INTERVAL = 1.0    # Seconds an idle worker waits before checking the queue again
+
+# Progress journals of unfinished transfers, used by --resume
+JOURNAL_DIR = "transfer_journals"
+
+# Mirrored playlists, used by --sync
+SYNC_STATE_FILE = "sync_state.json"
+SYNC_NOT_FOUND_RETRY = 7 * 24 * 60 * 60  # Seconds before tracks that weren't found are searched for again
+
+# Timers and counters for every stage of a run, so the bottleneck can be found without a profiler.
+# Times are summed across worker threads, so they can add up to more than the wall-clock time.
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.log = None
+        self.started = time.monotonic()
+
+    def open_log(self, path):
+        # Structured JSON log with one line per timed event
+        self.log = open(path, "a")
+
+    @contextmanager
+    def timer(self, stage):
+        start_time = time.monotonic()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.observe(stage, time.monotonic() - start_time, ok)
+
+    def observe(self, stage, seconds, ok=True):
+        with self.lock:
+            stats = self.stages.setdefault(stage, {'count': 0, 'errors': 0, 'seconds': 0.0, 'max': 0.0, 'recent': deque(maxlen=10000)})
+            stats['count'] += 1
+            stats['errors'] += 0 if ok else 1
+            stats['seconds'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['recent'].append(seconds)
+            if self.log:
+                self.log.write(json.dumps({'ts': round(time.time(), 3), 'stage': stage, 'seconds': round(seconds, 6), 'ok': ok}) + "\n")
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def event(self, name, **fields):
+        # Something worth seeing in the JSON log besides timings, e.g. a backoff
+        with self.lock:
+            if self.log:
+                self.log.write(json.dumps({'ts': round(time.time(), 3), 'event': name, **fields}) + "\n")
+
+    def snapshot(self):
+        with self.lock:
+            stages = {}
+            for stage, stats in self.stages.items():
+                recent = sorted(stats['recent'])
+                stages[stage] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'seconds': stats['seconds'],
+                    'max': stats['max'],
+                    'p95': recent[min(len(recent) - 1, int(0.95 * len(recent)))]
+                }
+            return {'elapsed': time.monotonic() - self.started, 'stages': stages, 'counters': dict(self.counters),
+                    'gauges': dict(self.gauges)}
+
+    def print_summary(self):
+        snapshot = self.snapshot()
+        if not snapshot['stages']:
+            return
         
-        if '?code=' in self.path:
-            AUTH_CODE = self.path.split('?code=')[1].split('&')[0]
-            
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b"<html><body><h1>Authentication Successful!</h1><p>You can close this window now.</p></body></html>")
-            
-            SERVER.shutdown()
-        else:
-            self.send_response(400)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            self.wfile.write(b"<html><body><h1>Authentication Failed</h1></body></html>")
-    
-    def log_message(self, format, *args):
-        # Suppress server logs
-        return
+        print("\n" + "-" * 60)
+        print(f"Time per stage (wall clock {snapshot['elapsed']:.1f}s, summed across workers):")
+        print(f"{'Stage':<28} {'Count':>7} {'Total s':>9} {'Avg ms':>8} {'p95 ms':>8} {'Errors':>7}")
+        for stage, stats in sorted(snapshot['stages'].items(), key=lambda pair: -pair[1]['seconds']):
+            average = stats['seconds'] / stats['count'] * 1000
+            print(f"{stage:<28} {stats['count']:>7} {stats['seconds']:>9.2f} {average:>8.1f} {stats['p95'] * 1000:>8.1f} {stats['errors']:>7}")
+        for name, value in sorted(snapshot['counters'].items()):
+            print(f"{name:<28} {value:>7}")
+        for name, value in sorted(snapshot['gauges'].items()):
+            print(f"{name:<28} {value:>7.2f}")
+
+    def close(self):
+        # Finish the JSON log with the totals
+        if self.log:
+            self.log.write(json.dumps({'ts': round(time.time(), 3), 'summary': self.snapshot()}) + "\n")
+            self.log.close()
+            self.log = None
+
+    def write_prometheus(self, path):
+        # Prometheus text exposition format, e.g. for node_exporter's textfile collector
+        # Each metric family is one contiguous group, starting with its TYPE line
+        snapshot = self.snapshot()
+        lines = []
+        for family, kind, value in (
+            ("stage_seconds_total", "counter", lambda stats: f"{stats['seconds']:.6f}"),
+            ("stage_calls_total", "counter", lambda stats: stats['count']),
+            ("stage_errors_total", "counter", lambda stats: stats['errors']),
+            ("stage_seconds_max", "gauge", lambda stats: f"{stats['max']:.6f}"),
+        ):
+            lines.append(f"# TYPE spotify_transfer_{family} {kind}")
+            for stage, stats in sorted(snapshot['stages'].items()):
+                lines.append(f'spotify_transfer_{family}{{stage="{stage}"}} {value(stats)}')
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f"# TYPE spotify_transfer_{name}_total counter")
+            lines.append(f"spotify_transfer_{name}_total {value}")
+        for name, value in sorted(snapshot['gauges'].items()):
+            lines.append(f"# TYPE spotify_transfer_{name} gauge")
+            lines.append(f"spotify_transfer_{name} {value:.6f}")
+        lines.append("# TYPE spotify_transfer_elapsed_seconds gauge")
+        lines.append(f"spotify_transfer_elapsed_seconds {snapshot['elapsed']:.3f}")
+        
+        with open(path + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(path + ".tmp", path)
+
+METRICS = Metrics()
 
 # Start OAuth server for Spotify
 def start_auth_server():
     global SERVER
+    import http.server
+    import socketserver
+    
+    # Callback handler for Spotify OAuth
+    class CallbackHandler(http.server.SimpleHTTPRequestHandler):
+        def do_GET(self):
+            global AUTH_CODE
+        
+            if '?code=' in self.path:
+                AUTH_CODE = self.path.split('?code=')[1].split('&')[0]
+            
+                self.send_response(200)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                self.wfile.write(b"<html><body><h1>Authentication Successful!</h1><p>You can close this window now.</p></body></html>")
+            
+                # Wake up the waiting main thread, which shuts the server down
+                AUTH_RECEIVED.set()
+            else:
+                self.send_response(400)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                self.wfile.write(b"<html><body><h1>Authentication Failed</h1></body></html>")
+    
+        def log_message(self, format, *args):
+            # Suppress server logs
+            return
+    
+    # Allow reuse so a run started right after the previous one can bind the port again
+    socketserver.TCPServer.allow_reuse_address = True
     SERVER = socketserver.TCPServer(("", REDIRECT_PORT), CallbackHandler)
     try:
-        SERVER.serve_forever()
+        # Poll often, shutdown() waits for the next poll (half a second by default)
+        SERVER.serve_forever(poll_interval=0.05)
     except:
         pass
 
 # Get Spotify auth code
 def get_spotify_auth_code():
-    global AUTH_CODE
-    
     # Create authorization URL
     auth_params = {
         'client_id': SPOTIFY_CLIENT_ID,
         'response_type': 'code',
         'redirect_uri': REDIRECT_URI,
-        'scope': 'playlist-read-private playlist-read-collaborative'
+        'scope': SPOTIFY_SCOPE
     }
-    auth_url = 'https://accounts.spotify.com/authorize?' + urlencode(auth_params)
+    auth_url = f'{SPOTIFY_ACCOUNTS_URL}/authorize?' + urlencode(auth_params)
     
     # Start server for callback
+    AUTH_RECEIVED.clear()
     server_thread = threading.Thread(target=start_auth_server)
     server_thread.daemon = True
     server_thread.start()
     
     # Open browser for user authentication
+    import webbrowser
     print("\nOpening your browser to authorize Spotify access...")
     webbrowser.open(auth_url)
     
-    # Wait for authentication
+    # Wait for the callback (up to 5 minutes); it wakes us up as soon as the code arrives
     print("Waiting for authorization...")
-    timeout = 300  # 5 minutes
-    start_time = time.time()
+    AUTH_RECEIVED.wait(timeout=300)
     
-    while not AUTH_CODE and time.time() - start_time < timeout:
-        time.sleep(1)
+    if SERVER:
+        SERVER.shutdown()
+        SERVER.server_close()
         
     if not AUTH_CODE:
         print("\nError: Authentication timed out")
@@ -100,8 +313,10 @@ def get_spotify_auth_code():
         
     return AUTH_CODE
 
-# Get Spotify access token
-def get_spotify_token(auth_code):
+# Request a token from Spotify's token endpoint
+def request_spotify_token(data):
+    import requests
+    
     # Encode client ID and secret
     auth_header = base64.b64encode(f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}".encode()).decode()
     
@@ -110,6 +325,16 @@ def get_spotify_token(auth_code):
         'Content-Type': 'application/x-www-form-urlencoded'
     }
     
+    with METRICS.timer("spotify_auth"):
+        response = requests.post(f'{SPOTIFY_ACCOUNTS_URL}/api/token', headers=headers, data=data)
+    response.raise_for_status()
+    
+    token = response.json()
+    token['expires_at'] = time.time() + token.get('expires_in', 3600)
+    return token
+
+# Get Spotify access token
+def get_spotify_token(auth_code):
     data = {
         'grant_type': 'authorization_code',
         'code': auth_code,
@@ -117,30 +342,252 @@ def get_spotify_token(auth_code):
     }
     
     try:
-        response = requests.post('https://accounts.spotify.com/api/token', headers=headers, data=data)
-        response.raise_for_status()
-        return response.json()['access_token']
+        return request_spotify_token(data)
     except Exception as e:
         print(f"\nError getting Spotify access token: {str(e)}")
-        if hasattr(response, 'text'):
-            print(f"Response: {response.text}")
+        if hasattr(e, 'response') and e.response is not None:
+            print(f"Response: {e.response.text}")
         sys.exit(1)
 
+# Saved Spotify access and refresh tokens. The access token is refreshed shortly before it
+# expires, so runs (and long transfers) don't need the browser once the user has logged in.
+class SpotifyCredentials:
+    def __init__(self, token, path=SPOTIFY_TOKEN_FILE):
+        self.token = token
+        self.path = path
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def read(path=SPOTIFY_TOKEN_FILE):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                token = json.load(f)
+        except ValueError:
+            return None
+        # A token granted for other permissions can't be reused
+        if token.get('scope_requested') != SPOTIFY_SCOPE or not token.get('refresh_token'):
+            return None
+        return token
+
+    @classmethod
+    def load(cls, path=SPOTIFY_TOKEN_FILE):
+        token = cls.read(path)
+        return cls(token, path) if token else None
+
+    def save(self):
+        self.token['scope_requested'] = SPOTIFY_SCOPE
+        # A temporary file of its own, so job workers saving at the same time don't clobber each
+        # other's. mkstemp makes it readable by the current user only, the refresh token grants
+        # access to the account
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), prefix=os.path.basename(self.path) + ".")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.token, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def reload(self):
+        # Pick up a token another process saved since this one was read. Returns whether it changed.
+        token = self.read(self.path)
+        if token and token.get('access_token') != self.token.get('access_token'):
+            self.token = token
+            return True
+        return False
+
+    def expiring(self):
+        return self.token.get('expires_at', 0) - time.time() < SPOTIFY_TOKEN_REFRESH_MARGIN
+
+    def refresh(self):
+        try:
+            token = request_spotify_token({'grant_type': 'refresh_token', 'refresh_token': self.token['refresh_token']})
+        except Exception:
+            # Another process may have rotated the refresh token in the meantime
+            if not self.reload():
+                raise
+            if not self.expiring():
+                return
+            token = request_spotify_token({'grant_type': 'refresh_token', 'refresh_token': self.token['refresh_token']})
+        # Spotify only sometimes rotates the refresh token
+        token.setdefault('refresh_token', self.token['refresh_token'])
+        self.token = token
+        self.save()
+
+    def get(self, force_refresh=False):
+        # A valid access token, refreshed first if it is about to expire
+        with self.lock:
+            if force_refresh or self.expiring():
+                # Another process (e.g. a job worker) may already have refreshed it
+                if not (self.reload() and not self.expiring()):
+                    self.refresh()
+            return self.token['access_token']
+
+# Authenticate with Spotify, reusing saved credentials when possible and only opening the browser when needed
+def get_spotify_credentials(login=False):
+    credentials = None if login else SpotifyCredentials.load()
+    
+    if credentials:
+        try:
+            credentials.get()
+            print("✓ Using saved Spotify credentials")
+            return credentials
+        except Exception as e:
+            print(f"× Saved Spotify credentials could not be refreshed ({str(e)}), logging in again...")
+    
+    auth_code = get_spotify_auth_code()
+    credentials = SpotifyCredentials(get_spotify_token(auth_code))
+    credentials.save()
+    return credentials
+
+# Shared HTTP session so Spotify requests reuse keep-alive connections
+def get_spotify_session():
+    global SPOTIFY_SESSION
+    
+    if SPOTIFY_SESSION is None:
+        import requests
+        SPOTIFY_SESSION = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=SPOTIFY_FETCH_CONCURRENCY)
+        SPOTIFY_SESSION.mount('https://', adapter)
+        SPOTIFY_SESSION.mount('http://', adapter)
+    
+    return SPOTIFY_SESSION
+
+# Persistent cache of Spotify responses by URL, with the ETag they were served with
+class SpotifyResponseCache:
+    def __init__(self, path=SPOTIFY_CACHE_FILE, max_entries=SPOTIFY_CACHE_MAX_ENTRIES):
+        import sqlite3
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        with self.lock:
+            self.evict()
+        self.db.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT etag, body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.db.commit()
+            return row
+
+    def put(self, key, etag, body):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses (key, etag, body, last_used) VALUES (?, ?, ?, ?)",
+                            (key, etag, body, time.time()))
+            self.puts += 1
+            if self.puts % SPOTIFY_CACHE_EVICT_INTERVAL == 0:
+                self.evict()
+            self.db.commit()
+
+    # Drop the least recently used pages beyond the size limit, in one statement.
+    # Callers hold the lock.
+    def evict(self):
+        excess = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+            )
+
+# Shared response cache, opened on first use
+def get_spotify_cache():
+    global SPOTIFY_CACHE
+    
+    with SPOTIFY_CACHE_LOCK:
+        if SPOTIFY_CACHE is None:
+            SPOTIFY_CACHE = SpotifyResponseCache()
+    return SPOTIFY_CACHE
+
+# GET a Spotify API endpoint, waiting and retrying when rate limited.
+# `token` is SpotifyCredentials (refreshed as needed) or a plain access token.
+# Responses are revalidated with If-None-Match, so unchanged pages aren't downloaded again.
+def spotify_get(token, url, params=None):
+    refreshed = False
+    cache = get_spotify_cache()
+    key = url + ("?" + urlencode(sorted(params.items())) if params else "")
+    cached = cache.get(key)
+    
+    while True:
+        access_token = token.get() if isinstance(token, SpotifyCredentials) else token
+        headers = {'Authorization': f'Bearer {access_token}'}
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        with METRICS.timer("spotify_request"):
+            response = get_spotify_session().get(url, headers=headers, params=params)
+        if response.status_code == 401 and isinstance(token, SpotifyCredentials) and not refreshed:
+            # Revoked or expired early; refresh once and try again
+            token.get(force_refresh=True)
+            refreshed = True
+            continue
+        if response.status_code == 429:
+            METRICS.count("spotify_throttled")
+            with METRICS.timer("spotify_rate_limit_wait"):
+                time.sleep(int(response.headers.get('Retry-After', 1)))
+            continue
+        
+        if response.status_code == 304 and cached:
+            METRICS.count("spotify_not_modified")
+            body = cached[1]
+        else:
+            response.raise_for_status()
+            body = response.content
+            # Bytes on the wire, i.e. after gzip (which requests negotiates by default)
+            METRICS.count("spotify_bytes_received", int(response.headers.get('Content-Length', len(body))))
+            if response.headers.get('ETag'):
+                cache.put(key, response.headers['ETag'], body)
+        
+        with METRICS.timer("spotify_parse"):
+            return json.loads(body)
+
+# Like executor.map, but with at most `window` calls in flight so the input is consumed lazily
+# and memory stays bounded. Results are yielded in input order.
+def bounded_map(executor, fn, iterable, window):
+    in_flight = deque()
+    
+    for item in iterable:
+        in_flight.append(executor.submit(fn, item))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+    
+    while in_flight:
+        yield in_flight.popleft().result()
+
+# Fetch every page of a paginated Spotify endpoint. Returns the total number of items and
+# a generator of the pages' items in order. The first page tells us the total, so the
+# remaining offsets are fetched concurrently, a bounded number of pages ahead of the consumer.
+def get_spotify_pages(token, url, limit, fields=None):
+    params = {'fields': fields} if fields else {}
+    first_page = spotify_get(token, url, dict(params, limit=limit, offset=0))
+    
+    def pages():
+        yield first_page['items']
+        
+        offsets = range(limit, first_page['total'], limit)
+        with ThreadPoolExecutor(max_workers=SPOTIFY_FETCH_CONCURRENCY) as executor:
+            fetch = lambda offset: spotify_get(token, url, dict(params, limit=limit, offset=offset))['items']
+            yield from bounded_map(executor, fetch, offsets, SPOTIFY_PREFETCH_PAGES)
+    
+    return first_page['total'], pages()
+
 # Get user's Spotify playlists
 def get_spotify_playlists(token):
     print("\nFetching your Spotify playlists...")
     
-    headers = {'Authorization': f'Bearer {token}'}
     playlists = []
-    url = 'https://api.spotify.com/v1/me/playlists?limit=50'
     
     try:
-        while url:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            playlists.extend(data['items'])
-            url = data.get('next')
+        for items in get_spotify_pages(token, f'{SPOTIFY_API_URL}/me/playlists', 50)[1]:
+            playlists.extend(items)
             
         return playlists
     except Exception as e:
@@ -171,38 +618,238 @@ def select_playlist(playlists):
             print("\nOperation cancelled")
             sys.exit(0)
 
+# Convert a Spotify playlist item into the track fields used for matching
+def parse_track(item):
+    return {
+        'name': item['track']['name'],
+        'artists': [artist['name'] for artist in item['track']['artists']],
+        'duration_ms': item['track'].get('duration_ms'),
+        'isrc': (item['track'].get('external_ids') or {}).get('isrc'),
+        'album': (item['track'].get('album') or {}).get('name'),
+        'id': item['track'].get('id')
+    }
+
+# A column of strings stored as UTF-8 in one buffer, with the end offset of each string
+class TextColumn:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+
+    def append(self, text):
+        self.data += (text or "").encode()
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, index):
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode()
+
+# Compact columnar storage for the tracks of large playlists and libraries. Text lives in
+# UTF-8 buffers, artist and album names are stored once and referenced by number, and
+# numbers live in typed arrays, so a track takes tens of bytes instead of a dict of objects.
+# Indexing returns the usual track dict.
+class TrackStore:
+    def __init__(self, tracks=()):
+        self.ids = TextColumn()
+        self.names = TextColumn()
+        self.isrcs = TextColumn()
+        self.durations = array('i')           # -1 when unknown
+        self.albums = array('i')              # Index into strings, -1 when unknown
+        self.artists = array('I')             # Indexes into strings, for all tracks in order
+        self.artist_offsets = array('I', [0]) # End of each track's artists in self.artists
+        self.strings = []
+        self.string_index = {}
+        for track in tracks:
+            self.append(track)
+
+    def intern(self, text):
+        index = self.string_index.get(text)
+        if index is None:
+            index = self.string_index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def append(self, track):
+        self.ids.append(track.get('id'))
+        self.names.append(track['name'])
+        self.isrcs.append(track.get('isrc'))
+        duration = track.get('duration_ms')
+        self.durations.append(-1 if duration is None else duration)
+        self.albums.append(-1 if track.get('album') is None else self.intern(track['album']))
+        self.artists.extend(self.intern(artist) for artist in track['artists'])
+        self.artist_offsets.append(len(self.artists))
+
+    def __len__(self):
+        return len(self.durations)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("track index out of range")
+        
+        duration = self.durations[index]
+        album = self.albums[index]
+        artists = self.artists[self.artist_offsets[index]:self.artist_offsets[index + 1]]
+        return {
+            'name': self.names[index],
+            'artists': [self.strings[artist] for artist in artists],
+            'duration_ms': None if duration < 0 else duration,
+            'isrc': self.isrcs[index] or None,
+            'album': None if album < 0 else self.strings[album],
+            'id': self.ids[index] or None
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+# Stream tracks from a playlist as pages arrive. Returns the number of playlist items
+# (which may include a few unavailable tracks that are skipped) and a generator of tracks.
+# `token` may also be a SpotifySnapshot, in which case the tracks are read from the file.
+def stream_playlist_tracks(token, playlist_id):
+    if isinstance(token, SpotifySnapshot):
+        return token.stream_tracks(playlist_id)
+    
+    try:
+        total, pages = get_spotify_pages(token, f'{SPOTIFY_API_URL}/playlists/{playlist_id}/tracks', 100, SPOTIFY_TRACK_FIELDS)
+    except Exception as e:
+        print(f"\nError fetching tracks: {str(e)}")
+        sys.exit(1)
+    
+    def tracks():
+        try:
+            for items in pages:
+                for item in items:
+                    if item['track']:
+                        yield parse_track(item)
+        except Exception as e:
+            print(f"\nError fetching tracks: {str(e)}")
+            sys.exit(1)
+    
+    return total, tracks()
+
 # Get tracks from a playlist
 def get_playlist_tracks(token, playlist_id):
     print("\nFetching playlist tracks...")
     
-    headers = {'Authorization': f'Bearer {token}'}
-    tracks = []
-    url = f'https://api.spotify.com/v1/playlists/{playlist_id}/tracks?limit=100'
+    total, stream = stream_playlist_tracks(token, playlist_id)
+    tracks = TrackStore(stream)
     
-    try:
-        while url:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            for item in data['items']:
-                if item['track']:
-                    track = {
-                        'name': item['track']['name'],
-                        'artists': [artist['name'] for artist in item['track']['artists']]
-                    }
-                    tracks.append(track)
+    print(f"✓ Found {len(tracks)} tracks in the playlist")
+    return tracks
+
+# Write playlists and their tracks to a snapshot file (JSON lines), one playlist at a time
+def export_snapshot(token, playlists, path):
+    print(f"\nExporting {len(playlists)} playlists to {path}...")
+    tracks_written = 0
+    
+    with open(path + ".tmp", "w") as f:
+        f.write(json.dumps({'format': SpotifySnapshot.FORMAT, 'created': round(time.time())}) + "\n")
+        for playlist in playlists:
+            f.write(json.dumps({'playlist': playlist}) + "\n")
+            total, tracks = stream_playlist_tracks(token, playlist['id'])
+            count = 0
+            for track in tracks:
+                f.write(json.dumps({'track': track}) + "\n")
+                count += 1
+            tracks_written += count
+            print(f"✓ {playlist['name']}: {count} tracks")
+    os.replace(path + ".tmp", path)
+    
+    print(f"✓ Exported {tracks_written} tracks")
+
+# Playlists and tracks exported by export_snapshot, used in place of the Spotify API.
+# Opening a snapshot only indexes where each playlist starts; tracks are read from
+# disk line by line when a playlist is transferred.
+class SpotifySnapshot:
+    FORMAT = "spotify-snapshot-1"
+
+    def __init__(self, path):
+        self.path = path
+        self.playlists = []
+        self.offsets = {}
+        self.counts = {}
+        
+        with open(path, "rb") as f:
+            header = json.loads(f.readline() or b"{}")
+            if header.get('format') != self.FORMAT:
+                raise ValueError(f"{path} is not a Spotify snapshot")
+            self.created = header.get('created')
             
-            url = data.get('next')
+            playlist_id = None
+            offset = f.tell()
+            for line in iter(f.readline, b""):
+                # Only playlist lines are parsed; track lines are just counted
+                if line.startswith(b'{"playlist"'):
+                    playlist = json.loads(line)['playlist']
+                    playlist_id = playlist['id']
+                    self.playlists.append(playlist)
+                    self.offsets[playlist_id] = offset + len(line)
+                    self.counts[playlist_id] = 0
+                elif playlist_id is not None:
+                    self.counts[playlist_id] += 1
+                offset += len(line)
+
+    def stream_tracks(self, playlist_id):
+        if playlist_id not in self.offsets:
+            print(f"\nError: playlist {playlist_id} is not in the snapshot {self.path}")
+            sys.exit(1)
         
-        print(f"✓ Found {len(tracks)} tracks in the playlist")
-        return tracks
-    except Exception as e:
-        print(f"\nError fetching tracks: {str(e)}")
+        def tracks():
+            with open(self.path, "rb") as f:
+                f.seek(self.offsets[playlist_id])
+                for line in f:
+                    record = json.loads(line)
+                    if 'track' not in record:
+                        break
+                    yield record['track']
+        
+        return self.counts[playlist_id], tracks()
+
+# Fingerprint of headers_auth.json, so a saved credential check only applies to the same credentials
+def youtube_auth_fingerprint():
+    with open("headers_auth.json", "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+# Whether the current credentials passed the test search within YTMUSIC_AUTH_CHECK_TTL
+def youtube_auth_recently_checked():
+    try:
+        with open(YTMUSIC_AUTH_CHECK_FILE) as f:
+            check = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (check.get('fingerprint') == youtube_auth_fingerprint() and
+            time.time() - check.get('checked_at', 0) < YTMUSIC_AUTH_CHECK_TTL)
+
+def remember_youtube_auth_check():
+    with open(YTMUSIC_AUTH_CHECK_FILE, "w") as f:
+        json.dump({'fingerprint': youtube_auth_fingerprint(), 'checked_at': round(time.time())}, f)
+
+# Make the next run test the credentials again, e.g. after YouTube Music rejected them
+def forget_youtube_auth_check():
+    if os.path.exists(YTMUSIC_AUTH_CHECK_FILE):
+        os.remove(YTMUSIC_AUTH_CHECK_FILE)
+
+# Create a YouTube Music client for a credentials file, with its own connection pool sized for
+# the search workers. The session lets the rate controller see headers such as Retry-After.
+def create_youtube_client(path, concurrency=SEARCH_CONCURRENCY):
+    # Import ytmusicapi with error handling
+    try:
+        from ytmusicapi import YTMusic
+    except ImportError:
+        print("Error: ytmusicapi is not installed. Install it using: pip install ytmusicapi")
         sys.exit(1)
+    import requests
+    
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency * PLAYLIST_CONCURRENCY)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.hooks['response'].append(record_response)
+    session.request = functools.partial(session.request, timeout=30)
+    return YTMusic(path, requests_session=session)
 
-# Initialize YouTube Music with auth file
-def setup_youtube_music():
+# Initialize YouTube Music with auth file, with a connection pool sized for the search workers
+def setup_youtube_music(concurrency=SEARCH_CONCURRENCY):
     print("\nInitializing YouTube Music with auth file...")
     try:
         # Check if headers_auth.json exists
@@ -212,125 +859,1838 @@ def setup_youtube_music():
             print("python youtube_auth_helper.py")
             sys.exit(1)
             
-        ytmusic = YTMusic("headers_auth.json")
+        ytmusic = create_youtube_client("headers_auth.json", concurrency)
+        
+        # The same credentials passed the test recently, don't spend a round trip on it again
+        if youtube_auth_recently_checked():
+            print("✓ YouTube Music credentials were checked recently, skipping the test search")
+            return ytmusic
         
-        # Test the connection with a simple search
-        search_results = ytmusic.search("test", filter="songs", limit=1)
+        # Test the connection with a simple search, retried like any other request if throttled
+        search_results = RateController().call(ytmusic.search, "test", filter="songs", limit=1)
         if search_results:
             print("✓ YouTube Music authentication successful!")
+            remember_youtube_auth_check()
             return ytmusic
         else:
             print("× YouTube Music connection returned no results")
             sys.exit(1)
     except Exception as e:
+        # Throttling and server errors that outlasted the retries don't mean the credentials are bad
+        if classify_error(e):
+            print(f"× YouTube Music is not responding: {str(e)}")
+            print("Please try again later.")
+            sys.exit(1)
         print(f"× YouTube Music authentication failed: {str(e)}")
         print("\nPlease run the authentication helper:")
         print("python youtube_auth_helper.py")
         sys.exit(1)
 
-# Create YouTube Music playlist and add tracks
-def transfer_to_youtube_music(ytmusic, playlist_name, tracks):
-    # Create new playlist
-    print(f"\nCreating YouTube Music playlist: '{playlist_name} (from Spotify)'...")
+# Normalize text so that trivial differences in case and spacing don't matter
+def normalize_text(text):
+    return " ".join(text.lower().split())
+
+# Build the cache key identifying a track regardless of which playlist it came from
+def track_cache_key(track):
+    if track.get('isrc'):
+        return f"isrc:{track['isrc'].upper()}"
     
-    try:
-        playlist_id = ytmusic.create_playlist(
-            title=f"{playlist_name} (from Spotify)",
-            description="Transferred from Spotify",
-            privacy_status="PRIVATE"
+    artists = ",".join(sorted(normalize_text(artist) for artist in track['artists']))
+    duration = round((track.get('duration_ms') or 0) / 2000)  # 2 second buckets
+    return f"{normalize_text(track['name'])}|{artists}|{duration}"
+
+# Persistent on-disk cache of Spotify track -> YouTube Music match
+class MatchCache:
+    def __init__(self, path=MATCH_CACHE_FILE, ttl=MATCH_CACHE_TTL, max_entries=MATCH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.lock = threading.Lock()
+        import sqlite3
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            "key TEXT PRIMARY KEY, match TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS matches_last_used ON matches (last_used)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS matches_created ON matches (created)")
+        with self.lock:
+            self.evict(time.time())
+        self.db.commit()
+
+    def get(self, track):
+        key = track_cache_key(track)
+        now = time.time()
+        
+        with self.lock:
+            row = self.db.execute("SELECT match, created FROM matches WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            
+            self.db.execute("UPDATE matches SET last_used = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, track, match):
+        now = time.time()
+        
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO matches (key, match, created, last_used) VALUES (?, ?, ?, ?)",
+                (track_cache_key(track), json.dumps(match), now, now)
+            )
+            
+            # Eviction runs every MATCH_CACHE_EVICT_INTERVAL puts, not on each one, since search workers share the lock
+            self.puts += 1
+            if self.puts % MATCH_CACHE_EVICT_INTERVAL == 0:
+                self.evict(now)
+            self.db.commit()
+
+    # Drop expired entries and then the least recently used ones beyond the size limit, using
+    # the indexes on created and last_used. Callers hold the lock.
+    def evict(self, now):
+        self.db.execute("DELETE FROM matches WHERE created < ?", (now - self.ttl,))
+        excess = self.db.execute("SELECT COUNT(*) FROM matches").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM matches WHERE key IN (SELECT key FROM matches ORDER BY last_used LIMIT ?)", (excess,)
+            )
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+# Token bucket shared by all workers to pace YouTube Music requests
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def acquire(self):
+        # Block until a token is available, then take it
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1 and now >= self.updated:
+                    self.tokens -= 1
+                    return
+                wait = max(self.updated - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # Hold back every worker for the given number of seconds
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = 0
+            self.updated = max(self.updated, time.monotonic() + seconds)
+
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def wait_time(self):
+        # Seconds until acquire() would get a token
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            return max(self.updated - now, (1 - self.tokens) / self.rate, 0)
+
+# Status and Retry-After of the last YouTube Music response seen by each thread. ytmusicapi
+# only raises a generic exception for HTTP errors, so the headers are captured with a hook.
+LAST_RESPONSE = threading.local()
+
+def record_response(response, *args, **kwargs):
+    LAST_RESPONSE.status = response.status_code
+    LAST_RESPONSE.retry_after = response.headers.get('Retry-After')
+
+# Classify a failed YouTube Music call: 'throttled' (HTTP 429), 'transient' (server errors and
+# timeouts, worth retrying) or None (an ordinary error that retrying won't fix)
+def classify_error(error):
+    import requests
+    status = getattr(LAST_RESPONSE, 'status', None)
+    message = str(error)
+    
+    if status == 429 or 'HTTP 429' in message or 'Too Many Requests' in message:
+        return 'throttled'
+    if (status and status >= 500) or isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return 'transient'
+    return None
+
+# Wraps every YouTube Music call: paces requests through a token bucket, adapts the rate with
+# AIMD, and retries throttled or transient failures with jittered exponential backoff.
+# The current rate is the METRICS gauge "<name>_rate", and every backoff is an event in the
+# JSON metrics log, so the settings can be tuned from a real run.
+class RateController:
+    def __init__(self, rate=YTMUSIC_RATE_LIMIT, burst=YTMUSIC_RATE_BURST, min_rate=YTMUSIC_MIN_RATE, max_rate=YTMUSIC_MAX_RATE, name="ytmusic"):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.last_decrease = 0
+        METRICS.gauge(f"{name}_rate", rate)
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def call(self, fn, *args, **kwargs):
+        stage = f"ytmusic_{fn.__name__}"
+        
+        for attempt in range(YTMUSIC_MAX_RETRIES):
+            with METRICS.timer("rate_limit_wait"):
+                self.bucket.acquire()
+            LAST_RESPONSE.status = None
+            LAST_RESPONSE.retry_after = None
+            
+            try:
+                with METRICS.timer(stage):
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None or attempt == YTMUSIC_MAX_RETRIES - 1:
+                    raise
+                self._backoff(kind, attempt)
+                continue
+            
+            with self.lock:
+                self.requests += 1
+                self.bucket.set_rate(min(self.max_rate, self.bucket.rate + RATE_INCREASE))
+            METRICS.gauge(f"{self.name}_rate", self.bucket.rate)
+            return result
+
+    def _backoff(self, kind, attempt):
+        # Honor Retry-After when given, otherwise back off exponentially with full jitter
+        retry_after = getattr(LAST_RESPONSE, 'retry_after', None)
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+        
+        with self.lock:
+            self.requests += 1
+            self.retries += 1
+            METRICS.count(f"ytmusic_{kind}")
+            if kind == 'throttled':
+                self.throttled += 1
+                # Requests in flight together tend to be throttled together; cut the rate once for them
+                if time.monotonic() - self.last_decrease > 1 / self.bucket.rate:
+                    self.bucket.set_rate(max(self.min_rate, self.bucket.rate * RATE_DECREASE))
+                    self.last_decrease = time.monotonic()
+            rate = self.bucket.rate
+        METRICS.gauge(f"{self.name}_rate", rate)
+        METRICS.event(f"{self.name}_backoff", kind=kind, attempt=attempt + 1, delay=round(delay, 3), rate=round(rate, 3))
+        
+        # Throttling applies to the whole account, so every worker waits; a transient error only delays this call
+        if kind == 'throttled':
+            self.bucket.pause(delay)
+        else:
+            with METRICS.timer("backoff_wait"):
+                time.sleep(delay)
+
+    def summary(self):
+        return (f"{self.requests} requests, {self.throttled} throttled, {self.retries} retries, "
+                f"rate now {self.rate:.2f} requests/second")
+
+# Spreads read-only YouTube Music calls such as searches over several accounts' credentials.
+# Each credential has its own rate controller, and each call goes to the healthy credential
+# that can send soonest. A credential that fails YTMUSIC_POOL_MAX_FAILURES calls in a row is
+# quarantined for YTMUSIC_POOL_QUARANTINE seconds, and starts with a clean slate afterwards.
+# A failed call is retried on the other credentials, each at most once.
+# It takes the place of a RateController for searches: call(ytmusic.search, ...) runs the same
+# method on the chosen credential's client. Writes keep using the playlist owner's client.
+# `share` is the part of each account's rate this process may use, when several processes use the same accounts.
+class CredentialPool:
+    def __init__(self, paths, concurrency=SEARCH_CONCURRENCY, rate=YTMUSIC_RATE_LIMIT, share=1):
+        self.lock = threading.Lock()
+        self.members = []
+        for path in paths:
+            if not os.path.exists(path):
+                print(f"× Credentials file {path} not found, skipping it")
+                continue
+            self.members.append({
+                'number': len(self.members), 'path': path, 'ytmusic': create_youtube_client(path, concurrency),
+                'limiter': RateController(rate * share, min_rate=YTMUSIC_MIN_RATE * share, max_rate=YTMUSIC_MAX_RATE * share,
+                                          name=f"ytmusic_pool{len(self.members)}"),
+                'in_flight': 0, 'failures': 0, 'quarantined_until': 0, 'calls': 0, 'errors': 0, 'quarantines': 0
+            })
+        if not self.members:
+            print("× None of the credentials files could be used")
+            sys.exit(1)
+
+    @property
+    def rate(self):
+        return sum(member['limiter'].rate for member in self.members if member['quarantined_until'] <= time.monotonic())
+
+    # The member to send a call to, leaving out the numbers in `tried`
+    def pick(self, tried=()):
+        with self.lock:
+            now = time.monotonic()
+            for member in self.members:
+                if member['quarantined_until'] and member['quarantined_until'] <= now:
+                    member['quarantined_until'] = 0
+                    member['failures'] = 0
+            
+            untried = [member for member in self.members if member['number'] not in tried]
+            healthy = [member for member in untried if not member['quarantined_until']]
+            if healthy:
+                member = min(healthy, key=lambda member: (member['limiter'].bucket.wait_time(), member['in_flight']))
+            else:
+                # Everything left is quarantined; try the one whose quarantine ends first
+                member = min(untried, key=lambda member: member['quarantined_until'])
+            member['in_flight'] += 1
+            return member
+
+    def call(self, fn, *args, **kwargs):
+        error = None
+        tried = set()
+        
+        for _ in range(len(self.members)):
+            member = self.pick(tried)
+            tried.add(member['number'])
+            try:
+                result = member['limiter'].call(getattr(member['ytmusic'], fn.__name__), *args, **kwargs)
+            except Exception as e:
+                error = e
+                self.failed(member, e)
+                continue
+            finally:
+                with self.lock:
+                    member['in_flight'] -= 1
+            
+            with self.lock:
+                member['calls'] += 1
+                member['failures'] = 0
+            return result
+        
+        raise error
+
+    def failed(self, member, error):
+        with self.lock:
+            member['calls'] += 1
+            member['errors'] += 1
+            member['failures'] += 1
+            if member['failures'] < YTMUSIC_POOL_MAX_FAILURES or member['quarantined_until'] > time.monotonic():
+                return
+            member['quarantined_until'] = time.monotonic() + YTMUSIC_POOL_QUARANTINE
+            member['quarantines'] += 1
+        METRICS.count("ytmusic_credentials_quarantined")
+        print(f"× Credentials {member['path']} failed {YTMUSIC_POOL_MAX_FAILURES} times in a row ({str(error)}), "
+              f"not using them for {YTMUSIC_POOL_QUARANTINE}s")
+
+    def summary(self):
+        now = time.monotonic()
+        healthy = sum(1 for member in self.members if member['quarantined_until'] <= now)
+        details = ", ".join(f"{os.path.basename(member['path'])}: {member['calls']} calls, {member['errors']} errors"
+                            f"{', quarantined' if member['quarantined_until'] > now else ''}" for member in self.members)
+        return f"{healthy}/{len(self.members)} credentials healthy ({details})"
+
+# Words that mark a different recording than the studio version, unless the Spotify title has them too
+VERSION_MARKERS = ('live', 'cover', 'karaoke', 'instrumental', 'remix', 'acoustic', 'sped up', 'slowed', 'tribute')
+VERSION_MARKER_PATTERNS = [(marker, re.compile(rf"\b{re.escape(marker)}\b")) for marker in VERSION_MARKERS]
+
+# Version markers in a title as whole words, so "Oliver" isn't live and "Discover" isn't a cover
+def version_markers(title):
+    text = normalize_text(title)
+    return {marker for marker, pattern in VERSION_MARKER_PATTERNS if pattern.search(text)}
+
+# Numbers in a title without its bracketed extras, e.g. {"2"} for "Interlude 2 (Remastered 2011)"
+def title_numbers(title):
+    return set(re.findall(r"\d+", strip_title_extras(title)))
+
+# Remove bracketed suffixes such as "(Remastered 2011)" or "[feat. X]" and " - Radio Edit"
+def strip_title_extras(title):
+    return normalize_text(re.sub(r"\s*[\(\[][^\)\]]*[\)\]]|\s+-\s+.*$", "", title)) or normalize_text(title)
+
+# Fuzzy similarity between two strings, from 0 to 1
+def similarity(a, b):
+    return SequenceMatcher(None, normalize_text(a), normalize_text(b)).ratio()
+
+# Score how likely a search result is the same recording as the Spotify track, roughly from 0 to 1.
+# The score isn't clamped, so that e.g. an album bonus still separates two otherwise perfect matches.
+def score_candidate(track, candidate):
+    title = candidate.get('title') or ''
+    title_score = max(similarity(track['name'], title), similarity(strip_title_extras(track['name']), strip_title_extras(title)))
+    
+    # Fraction of the Spotify artists found among the candidate's artists
+    candidate_artists = [artist['name'] for artist in candidate.get('artists') or [] if artist.get('name')]
+    if track['artists'] and candidate_artists:
+        artist_score = sum(
+            max(similarity(artist, other) for other in candidate_artists) for artist in track['artists']
+        ) / len(track['artists'])
+    else:
+        artist_score = 0
+    
+    # Full marks within the tolerance, dropping to nothing at four times the tolerance
+    duration = candidate.get('duration_seconds')
+    if track.get('duration_ms') and duration:
+        difference = abs(track['duration_ms'] / 1000 - duration)
+        duration_score = max(0.0, 1 - max(0.0, difference - DURATION_TOLERANCE) / (3 * DURATION_TOLERANCE))
+    else:
+        duration_score = 0.5
+    
+    score = 0.45 * title_score + 0.35 * artist_score + 0.2 * duration_score
+    
+    # Small bonus for the same album, penalty for live versions, covers and the like
+    album = (candidate.get('album') or {}).get('name')
+    if track.get('album') and album and similarity(track['album'], album) > 0.8:
+        score += 0.05
+    if version_markers(title) - version_markers(track['name']):
+        score -= 0.25
+    
+    # Sibling tracks ("Part 1", "Part 2") look almost identical otherwise
+    if title_numbers(title) != title_numbers(track['name']):
+        score -= NUMBER_MISMATCH_PENALTY
+    
+    return score
+
+# Pick the highest scoring candidate, returning (score clamped to 0..1, candidate) or (0, None)
+def best_candidate(track, candidates):
+    with METRICS.timer("match_scoring"):
+        scored = [(score_candidate(track, candidate), candidate) for candidate in candidates if candidate.get('videoId')]
+    score, candidate = max(scored, key=lambda pair: pair[0], default=(0, None))
+    return max(0.0, min(1.0, score)), candidate
+
+# Text a song is indexed by: its title without bracketed extras and its artists, in any order
+def catalog_text(title, artists):
+    return f" {strip_title_extras(title)} {' '.join(sorted(normalize_text(artist) for artist in artists))} "
+
+# Every run of three characters in the text
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+# Local index of every YouTube Music song seen in search results, kept in CATALOG_INDEX_FILE.
+# A trigram inverted index finds songs with near-miss titles (remaster suffixes, "feat." credits,
+# other artist orders) that an exact-key cache misses, so the more we search, the less we need to.
+# Songs are loaded into memory in the background, most recently seen first; lookups don't wait
+# for that and use the songs loaded so far.
+class CatalogIndex:
+    def __init__(self, path=CATALOG_INDEX_FILE, max_entries=CATALOG_INDEX_MAX_ENTRIES):
+        import sqlite3
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.songs = []       # (video_id, title, artists as JSON, album, duration_seconds, text)
+        self.positions = {}   # video_id -> position in songs
+        self.postings = {}    # trigram -> array of positions in songs
+        # Job server workers share the file
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS songs ("
+            "video_id TEXT PRIMARY KEY, title TEXT NOT NULL, artists TEXT NOT NULL, album TEXT, "
+            "duration_seconds INTEGER, text TEXT NOT NULL, seen REAL NOT NULL)"
         )
+        self.db.execute("CREATE INDEX IF NOT EXISTS songs_seen ON songs (seen)")
+        self.db.commit()
+        threading.Thread(target=self._load, daemon=True).start()
+
+    def _load(self):
+        with self.lock:
+            self.db.execute(
+                "DELETE FROM songs WHERE video_id IN (SELECT video_id FROM songs ORDER BY seen DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self.db.commit()
+            # The stored text saves normalizing every title again
+            rows = self.db.execute(
+                "SELECT video_id, title, artists, album, duration_seconds, text FROM songs ORDER BY seen DESC"
+            ).fetchall()
+        
+        # In chunks, so lookups and new songs get the lock in between
+        for start in range(0, len(rows), 1000):
+            with self.lock:
+                for song in rows[start:start + 1000]:
+                    if song[0] not in self.positions and len(self.songs) < self.max_entries:
+                        self._index(song)
+
+    def _index(self, song):
+        position = len(self.songs)
+        self.songs.append(song)
+        self.positions[song[0]] = position
+        for gram in trigrams(song[5]):
+            try:
+                self.postings[gram].append(position)
+            except KeyError:
+                self.postings[gram] = array('I', [position])
+
+    def add(self, candidates):
+        now = time.time()
+        rows = []
+        
+        with self.lock:
+            for candidate in candidates:
+                if not candidate.get('videoId'):
+                    continue
+                title = candidate.get('title') or ''
+                artists = [artist['name'] for artist in candidate.get('artists') or [] if artist.get('name')]
+                song = (candidate['videoId'], title, json.dumps(artists), (candidate.get('album') or {}).get('name'),
+                        candidate.get('duration_seconds'), catalog_text(title, artists))
+                rows.append(song + (now,))
+                # Beyond the limit, new songs are only stored; the most recent ones are loaded next time
+                if song[0] not in self.positions and len(self.songs) < self.max_entries:
+                    self._index(song)
+            
+            if rows:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO songs (video_id, title, artists, album, duration_seconds, text, seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                self.db.commit()
+
+    # Songs most similar to the track, as search results that best_candidate can score
+    def search(self, track, limit=MATCH_CANDIDATES):
+        grams = trigrams(catalog_text(track['name'], track['artists']))
+        
+        with self.lock:
+            lists = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+            if not lists:
+                return []
+            
+            # The rarer half of the trigrams is enough to find near misses, and skips the long
+            # posting lists of common ones such as " th"
+            counts = Counter()
+            for postings in lists[:max(3, len(lists) // 2)]:
+                counts.update(postings)
+            shortlist = [self.songs[position] for position, _ in counts.most_common(limit * 4)]
+        
+        # Rank the shortlist by the overlap of all trigrams (Dice coefficient)
+        def overlap(song):
+            song_grams = trigrams(song[5])
+            return 2 * len(grams & song_grams) / (len(grams) + len(song_grams))
+        
+        return [{'videoId': video_id, 'title': title, 'artists': [{'name': artist} for artist in json.loads(artists)],
+                 'album': {'name': album} if album else None, 'duration_seconds': duration}
+                for video_id, title, artists, album, duration, _ in sorted(shortlist, key=overlap, reverse=True)[:limit]]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+# The match returned for a chosen search result
+def match_from_candidate(candidate, score, alternate=False):
+    return {
+        'video_id': candidate["videoId"],
+        'title': candidate.get('title', 'Unknown'),
+        'artist': (candidate.get('artists') or [{'name': 'Unknown'}])[0]['name'],
+        'score': round(score, 3),
+        'alternate': alternate
+    }
+
+# Search YouTube Music for a single Spotify track. With a catalog index, songs seen in earlier
+# searches are tried first, and every search result is added to it.
+def match_track(ytmusic, track, limiter, cache=None, index=None):
+    track_name = track['name']
+    artists = ", ".join(track['artists'])
+    search_query = f"{track_name} {artists}"
+
+    # Previously matched tracks skip the network entirely
+    if cache:
+        with METRICS.timer("match_cache"):
+            match = cache.get(track)
+        if match:
+            METRICS.count("match_cache_hits")
+            match['cached'] = True
+            return match
         
-        print(f"✓ Created new playlist with ID: {playlist_id}")
+        match = match_track(ytmusic, track, limiter, index=index)
+        if match['video_id']:
+            cache.put(track, match)
+        return match
+
+    try:
+        # Only go to the network when no song seen before is a confident match. The titles must be
+        # the same apart from bracketed extras, so siblings such as "Interlude 1" and "Interlude 2"
+        # from the same album are never taken for each other without a search.
+        if index:
+            with METRICS.timer("catalog_index"):
+                title = strip_title_extras(track_name)
+                candidates = [candidate for candidate in index.search(track) if strip_title_extras(candidate['title']) == title]
+                score, best_match = best_candidate(track, candidates)
+            if best_match and score >= CATALOG_INDEX_MIN_SCORE:
+                METRICS.count("catalog_index_hits")
+                match = match_from_candidate(best_match, score)
+                match['indexed'] = True
+                return match
+        
+        # Search for the track and rank every result
+        search_results = limiter.call(ytmusic.search, search_query, filter="songs", limit=MATCH_CANDIDATES)
+        if index:
+            index.add(search_results or [])
+        score, best_match = best_candidate(track, search_results or [])
+        alternate = False
+
+        # Only spend a second request on a simpler search with just the track name when unsure
+        if score < MATCH_CONFIDENCE_THRESHOLD:
+            search_results = limiter.call(ytmusic.search, strip_title_extras(track_name), filter="songs", limit=MATCH_CANDIDATES)
+            if index:
+                index.add(search_results or [])
+            fallback_score, fallback_match = best_candidate(track, search_results or [])
+            if fallback_score > score:
+                score, best_match, alternate = fallback_score, fallback_match, True
+
+        if best_match and score >= MATCH_MIN_SCORE:
+            return match_from_candidate(best_match, score, alternate)
+
+        return {'video_id': None}
     except Exception as e:
-        print(f"× Error creating playlist: {str(e)}")
-        print("\nPlease run the authentication helper to get full access:")
-        print("python youtube_auth_helper.py")
-        return
+        return {'video_id': None, 'error': str(e)}
+
+# Describe where a match came from for the progress output
+def describe_match(match):
+    if match.get('resumed'):
+        return "✓ Matched before the last checkpoint"
+    if match.get('reported'):
+        return f"✓ Matched in dry run: {match.get('title', 'unknown title')}"
+    if match.get('cached'):
+        return f"✓ Found in match cache: {match.get('title', 'alternate match')}"
+    if match.get('indexed'):
+        return f"✓ Found in local index: {match['title']} by {match['artist']} (score {match['score']:.2f})"
+    if match['alternate']:
+        return f"✓ Found alternate match: {match['title']} by {match['artist']} (score {match['score']:.2f})"
+    return f"✓ Found: {match['title']} by {match['artist']} (score {match['score']:.2f})"
+
+# Resolves tracks to YouTube Music matches for any number of concurrent transfers. Identical
+# lookups in flight are collapsed into a single search, and finished matches are kept in a
+# bounded in-memory LRU, so searches scale with unique songs rather than with total tracks.
+class MatchService:
+    def __init__(self, ytmusic, limiter, cache=None, max_entries=MATCH_SERVICE_MAX_ENTRIES, index=None):
+        self.ytmusic = ytmusic
+        self.limiter = limiter
+        self.cache = cache
+        self.index = index
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.matches = OrderedDict()
+        self.in_flight = {}
+        self.lookups = 0
+        self.memory_hits = 0
+        self.coalesced = 0
+        self.searches = 0
+        self.indexed = 0
+
+    def resolve(self, track):
+        key = track_cache_key(track)
+        
+        with self.lock:
+            self.lookups += 1
+            if key in self.matches:
+                self.matches.move_to_end(key)
+                self.memory_hits += 1
+                METRICS.count("match_service_memory_hits")
+                return dict(self.matches[key])
+            
+            future = self.in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self.in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+                METRICS.count("match_service_coalesced")
+        
+        # The first caller runs the lookup; the others wait for its result
+        if not owner:
+            return dict(future.result())
+        
+        try:
+            match = match_track(self.ytmusic, track, self.limiter, self.cache, self.index)
+        except BaseException as e:
+            with self.lock:
+                del self.in_flight[key]
+            future.set_exception(e)
+            raise
+        
+        with self.lock:
+            del self.in_flight[key]
+            if match.get('indexed') and not match.get('cached'):
+                self.indexed += 1
+            elif not match.get('cached'):
+                self.searches += 1
+            # Don't keep transient errors, let the next lookup try again
+            if not match.get('error'):
+                self.matches[key] = match
+                while len(self.matches) > self.max_entries:
+                    self.matches.popitem(last=False)
+        
+        future.set_result(match)
+        return dict(match)
+
+    def stats(self):
+        with self.lock:
+            return {'lookups': self.lookups, 'memory_hits': self.memory_hits, 'coalesced': self.coalesced,
+                    'searches': self.searches, 'indexed': self.indexed, 'entries': len(self.matches)}
+
+    def summary(self):
+        stats = self.stats()
+        return (f"{stats['lookups']} lookups, {stats['searches']} searched, {stats['indexed']} found in the local index, "
+                f"{stats['memory_hits'] + stats['coalesced']} shared with other transfers")
+
+# Client for a match service running in another process (see --serve-matches)
+class RemoteMatchService:
+    def __init__(self, url):
+        import requests
+        self.url = url.rstrip("/")
+        self.session = requests.Session()
+
+    def resolve(self, track):
+        try:
+            with METRICS.timer("match_service"):
+                response = self.session.post(f"{self.url}/match", json={'track': track}, timeout=600)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            return {'video_id': None, 'error': f"match service: {str(e)}"}
+
+    def stats(self):
+        try:
+            return self.session.get(f"{self.url}/stats", timeout=10).json()
+        except Exception:
+            return None
+
+    def summary(self):
+        stats = self.stats()
+        if not stats:
+            return f"match service at {self.url} is not reachable"
+        return (f"match service at {self.url}: {stats['lookups']} lookups from all transfers, "
+                f"{stats['searches']} searched")
+
+# Run a match service on localhost until interrupted
+def serve_match_service(service, port=MATCH_SERVICE_PORT):
+    import http.server
     
-    print("\nTransferring tracks (this may take a while)...")
-    print("-" * 60)
+    # HTTP front end of a MatchService shared by transfers in other processes
+    class MatchServiceHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path != "/match":
+                return self.reply(404, {'error': 'not found'})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                track = body['track']
+            except (ValueError, KeyError, TypeError):
+                return self.reply(400, {'error': 'expected {"track": {...}}'})
+            self.reply(200, self.server.service.resolve(track))
+
+        def do_GET(self):
+            if self.path != "/stats":
+                return self.reply(404, {'error': 'not found'})
+            self.reply(200, self.server.service.stats())
+
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Suppress server logs
+            return
+    
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), MatchServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"\nMatch service listening on http://127.0.0.1:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        print(f"Match service: {service.summary()}")
+
+# Serves the matches of a dry-run report, so a real run after a dry run doesn't search again.
+# Tracks that aren't in the report (e.g. added since) go to the fallback match service.
+class ReportMatcher:
+    def __init__(self, path, fallback=None):
+        with open(path) as f:
+            report = json.load(f)
+        
+        self.fallback = fallback
+        self.matches = {}
+        self.used = 0
+        for playlist in report['playlists']:
+            for match in playlist['matches']:
+                # Tracks whose search failed are searched again
+                if not match.get('error'):
+                    self.matches[match['key']] = match
+
+    def resolve(self, track):
+        match = self.matches.get(track_cache_key(track))
+        if match is None:
+            return self.fallback.resolve(track)
+        
+        self.used += 1
+        METRICS.count("match_report_hits")
+        return {'video_id': match['video_id'], 'title': match.get('title'), 'artist': match.get('artist'),
+                'score': match.get('score'), 'alternate': match.get('alternate', False), 'reported': True}
+
+    def summary(self):
+        return f"{self.used} from the match report, other tracks: {self.fallback.summary()}"
+
+# The match service for a transfer: the one given or a new one sharing the transfer's rate budget.
+# With a credential pool, searches are spread over the pool instead, and with a catalog index,
+# songs seen in earlier searches are matched locally first.
+def get_matcher(matcher, ytmusic, limiter, cache):
+    if matcher is None:
+        return MatchService(ytmusic, YTMUSIC_POOL or limiter, cache, index=CATALOG_INDEX)
+    if isinstance(matcher, ReportMatcher) and matcher.fallback is None:
+        matcher.fallback = MatchService(ytmusic, YTMUSIC_POOL or limiter, cache, index=CATALOG_INDEX)
+    return matcher
+
+# Write-ahead journal of a transfer so an interrupted run can be resumed
+class TransferJournal:
+    def __init__(self, spotify_playlist_id, directory=JOURNAL_DIR):
+        self.path = os.path.join(directory, f"{spotify_playlist_id}.jsonl")
+        self.file = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        # Replay the journal into the playlist ID and the per-track state of the last checkpoint
+        state = {'playlist_id': None, 'resolved': {}, 'committed': set()}
+        
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    break
+                
+                if record['event'] == 'playlist':
+                    state['playlist_id'] = record['playlist_id']
+                elif record['event'] == 'batch':
+                    for index, key, video_id in record['resolved']:
+                        state['resolved'][index] = (key, video_id)
+                    state['committed'].update(record['committed'])
+        
+        return state
+
+    def start(self, playlist_id, playlist_name):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, "w")
+        self._write({'event': 'playlist', 'playlist_id': playlist_id, 'name': playlist_name})
+
+    def reopen(self):
+        self.file = open(self.path, "a")
+
+    def record_batch(self, resolved, committed):
+        self._write({'event': 'batch', 'resolved': resolved, 'committed': committed})
+
+    def _write(self, record):
+        # Flush and fsync each record so it survives a crash right after the batch
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def remove(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        if self.exists():
+            os.remove(self.path)
+
+# Add a chunk of (index, videoId) items to the playlist, splitting it in half and retrying when it is rejected.
+# Returns the indexes of the tracks that were committed.
+def insert_chunk(ytmusic, playlist_id, items, limiter, verbose=True, duplicates=False):
+    start_time = time.monotonic()
+    
+    try:
+        status = limiter.call(ytmusic.add_playlist_items, playlist_id, [video_id for _, video_id in items], duplicates=duplicates)
+        error = None if isinstance(status, dict) and 'SUCCEEDED' in status.get('status', '') else "request was not accepted"
+    except Exception as e:
+        error = str(e)
+    
+    elapsed = time.monotonic() - start_time
+    
+    if not error:
+        if verbose:
+            print(f"  ✓ Committed {len(items)} tracks in {elapsed:.2f}s")
+        return [index for index, _ in items]
+    
+    if len(items) == 1:
+        if verbose:
+            print(f"  × Could not add {items[0][1]}: {error}")
+        return []
+    
+    # Retry each half separately so one bad videoId doesn't sink the whole chunk
+    if verbose:
+        print(f"  × Chunk of {len(items)} tracks failed after {elapsed:.2f}s ({error}), splitting and retrying...")
+    middle = len(items) // 2
+    return (insert_chunk(ytmusic, playlist_id, items[:middle], limiter, verbose, duplicates) +
+            insert_chunk(ytmusic, playlist_id, items[middle:], limiter, verbose, duplicates))
+
+# Create YouTube Music playlist and add tracks
+# Tracks may be a list or a stream (pass `total` for progress output); they are matched and
+# committed as they arrive. Returns the playlist ID, a [key, videoId] entry for each track,
+# where videoId is None if the track wasn't added, the time at which each track that
+# YouTube Music doesn't have was searched for (by key), and the transfer's counters.
+# With verbose=False only batch progress is printed, prefixed with the playlist name.
+# `progress`, if given, is called with the added and failed counts after every batch.
+# With reconcile=True the finished playlist is checked against the tracks that should be in it.
+def transfer_to_youtube_music(ytmusic, playlist_name, tracks, total=None, concurrency=SEARCH_CONCURRENCY, rate_limit=YTMUSIC_RATE_LIMIT, batch_size=INSERT_BATCH_SIZE, cache=None, journal=None, resume=False, playlist_id=None, limiter=None, matcher=None, verbose=True, progress=None, reconcile=True):
+    start_time = time.monotonic()
+    
+    # Work already done by an interrupted run
+    state = {'playlist_id': None, 'resolved': {}, 'committed': set()}
+    if journal and resume and journal.exists():
+        state = journal.load()
+    
+    if total is None:
+        total = len(tracks)
+    
+    # Shared rate controller for searches and playlist writes
+    limiter = limiter or RateController(rate_limit)
+    
+    if state['playlist_id']:
+        playlist_id = state['playlist_id']
+        print(f"\nResuming transfer into existing playlist with ID: {playlist_id}")
+        journal.reopen()
+    elif playlist_id:
+        # Add to a playlist that already exists, e.g. when syncing
+        print(f"\nAdding {total} tracks to existing playlist with ID: {playlist_id}")
+        if journal:
+            journal.start(playlist_id, playlist_name)
+    else:
+        # Create new playlist
+        print(f"\nCreating YouTube Music playlist: '{playlist_name} (from Spotify)'...")
+        
+        try:
+            playlist_id = limiter.call(
+                ytmusic.create_playlist,
+                title=f"{playlist_name} (from Spotify)",
+                description="Transferred from Spotify",
+                privacy_status="PRIVATE"
+            )
+            
+            print(f"✓ Created new playlist with ID: {playlist_id}")
+        except Exception as e:
+            print(f"× Error creating playlist: {str(e)}")
+            # Only a rejected request points at the credentials; throttling and server errors don't
+            if classify_error(e) is None:
+                forget_youtube_auth_check()
+                print("\nPlease run the authentication helper to get full access:")
+                print("python youtube_auth_helper.py")
+            return
+        
+        if journal:
+            journal.start(playlist_id, playlist_name)
     
     # Track counters
-    total = len(tracks)
     success = 0
     failed = 0
+    skipped = 0
+    entries = {}
+    not_found = {}
     
-    # Process each track
-    for i, track in enumerate(tracks):
-        track_name = track['name']
-        artists = ", ".join(track['artists'])
-        search_query = f"{track_name} {artists}"
+    # Skip tracks finished before the last checkpoint, as long as the playlist hasn't changed underneath them
+    def remaining():
+        nonlocal success, failed, skipped
         
-        print(f"[{i+1}/{total}] Searching for: {track_name} by {artists}")
-        
-        try:
-            # Search for the track
-            search_results = ytmusic.search(search_query, filter="songs", limit=3)
+        for index, track in enumerate(tracks):
+            key = track_cache_key(track)
+            resolved_key, video_id = state['resolved'].get(index, (None, None))
             
-            if search_results:
-                # Take the first result as the best match
-                best_match = search_results[0]
-                video_id = best_match["videoId"]
-                
-                # Add track to playlist
-                status = ytmusic.add_playlist_items(playlist_id, [video_id])
+            if resolved_key != key:
+                yield index, track, None
+            elif index in state['committed']:
+                entries[index] = [key, video_id]
                 success += 1
-                print(f"✓ Added to playlist: {best_match.get('title', 'Unknown')} by {best_match.get('artists', [{'name': 'Unknown'}])[0]['name']}")
+                skipped += 1
+            elif video_id:
+                yield index, track, {'video_id': video_id, 'resumed': True}
             else:
-                # Try a simpler search with just the track name
-                print(f"  Trying simpler search with just track name...")
-                search_results = ytmusic.search(track_name, filter="songs", limit=1)
+                entries[index] = [key, None]
+                failed += 1
+                skipped += 1
+    
+    # Tracks are resolved through the match service, which may be shared with other transfers
+    matcher = get_matcher(matcher, ytmusic, limiter, cache)
+    
+    print("\nTransferring tracks (this may take a while)...")
+    print(f"Searching with {concurrency} workers, starting at {limiter.rate:g} requests/second")
+    print("-" * 60)
+    
+    # Tracks resolved since the last checkpoint, and matched (index, videoId) items waiting to be committed
+    resolved = []
+    pending = []
+    
+    def search(entry):
+        index, track, known_match = entry
+        if known_match:
+            return entry, known_match
+        return entry, matcher.resolve(track)
+    
+    # Commit matched tracks and checkpoint them in the journal
+    def commit():
+        nonlocal success, failed, resolved, pending
+        
+        committed = insert_chunk(ytmusic, playlist_id, pending, limiter, verbose) if pending else []
+        for index, video_id in pending:
+            if index in committed:
+                entries[index][1] = video_id
+        success += len(committed)
+        failed += len(pending) - len(committed)
+        if journal:
+            journal.record_batch(resolved, committed)
+        if pending and verbose:
+            print(f"  {success}/{total} tracks committed to the playlist")
+        elif pending:
+            print(f"[{playlist_name}] {success}/{total} tracks committed")
+        if progress:
+            progress(success, failed)
+        resolved = []
+        pending = []
+    
+    # Results arrive in playlist order while later searches are still running
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for (index, track, _), match in bounded_map(executor, search, remaining(), concurrency * 4):
+            track_name = track['name']
+            artists = ", ".join(track['artists'])
+            key = track_cache_key(track)
+            entries[index] = [key, None]
+            
+            if verbose:
+                print(f"[{index+1}/{total}] Searching for: {track_name} by {artists}")
+            
+            try:
+                if match.get('error'):
+                    raise Exception(match['error'])
                 
-                if search_results:
-                    video_id = search_results[0]["videoId"]
-                    status = ytmusic.add_playlist_items(playlist_id, [video_id])
-                    success += 1
-                    print(f"✓ Added to playlist (alternate match)")
+                resolved.append([index, key, match['video_id']])
+                
+                if match['video_id']:
+                    pending.append((index, match['video_id']))
+                    if verbose:
+                        print(describe_match(match))
                 else:
-                    print(f"× Could not find track")
+                    if verbose:
+                        print(f"× Could not find track")
+                    not_found[key] = time.time()
                     failed += 1
                 
-            # Sleep to avoid rate limiting
-            time.sleep(1)
+            except Exception as e:
+                if verbose:
+                    print(f"× Error: {str(e)}")
+                failed += 1
             
+            if len(pending) >= batch_size:
+                commit()
+        
+        commit()
+    
+    # Count what actually landed in the playlist, not the write requests that were accepted
+    if reconcile and success:
+        expected = [(index, entries[index][1]) for index in sorted(entries) if entries[index][1]]
+        result = reconcile_playlist(ytmusic, playlist_id, expected, limiter, batch_size, verbose)
+        for index, _ in expected:
+            if index not in result['present']:
+                entries[index][1] = None
+                success -= 1
+                failed += 1
+        
+        summary = f"{len(result['present'])}/{len(expected)} tracks in the playlist"
+        if result['missing']:
+            summary += f", {result['re_added']} of {result['missing']} missing tracks added again"
+        if result['duplicates']:
+            summary += f", {result['removed']} of {result['duplicates']} duplicates removed"
+        if result['unexpected']:
+            summary += f", {result['unexpected']} other tracks left alone"
+        print(f"✓ Verified: {summary}" if verbose else f"[{playlist_name}] Verified: {summary}")
+        if progress:
+            progress(success, failed)
+    
+    # The transfer is complete, so there is nothing left to resume
+    if journal:
+        journal.remove()
+    
+    if verbose:
+        if skipped:
+            print(f"Skipped {skipped} tracks finished before the last checkpoint")
+        print("-" * 60)
+        print(f"\nTransfer summary: {success}/{len(entries)} tracks added, {failed} failed")
+        if cache:
+            print(f"Match cache: {cache.hits} hits, {cache.misses} misses")
+        print(f"Matching: {matcher.summary()}")
+        print(f"YouTube Music: {limiter.summary()}")
+        if YTMUSIC_POOL:
+            print(f"Credentials: {YTMUSIC_POOL.summary()}")
+        print(f"\nYour playlist is ready! You can access it in YouTube Music.")
+    
+    return {
+        'playlist_id': playlist_id,
+        'tracks': [entries[index] for index in sorted(entries)],
+        'not_found': not_found,
+        'added': success,
+        'failed': failed,
+        'elapsed': time.monotonic() - start_time
+    }
+
+# Load the state of mirrored playlists from previous transfers and syncs
+def load_sync_state(path=SYNC_STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+# Save the sync state atomically so an interrupted run can't corrupt it
+def save_sync_state(state, path=SYNC_STATE_FILE):
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+# Remember which videoId mirrors each track of a Spotify playlist, given [key, videoId] entries
+# and when tracks that YouTube Music doesn't have were last searched for, by key
+def record_sync_state(state, spotify_playlist, playlist_id, entries, not_found=None):
+    state[spotify_playlist['id']] = {
+        'name': spotify_playlist['name'],
+        'snapshot_id': spotify_playlist.get('snapshot_id'),
+        'playlist_id': playlist_id,
+        'synced_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        'tracks': entries,
+        'not_found': not_found or {}
+    }
+
+# Tracks of a mirrored playlist that weren't found on YouTube Music within SYNC_NOT_FOUND_RETRY,
+# so they aren't searched for again yet
+def recent_not_found(entry):
+    now = time.time()
+    return {key: at for key, at in entry.get('not_found', {}).items() if now - at < SYNC_NOT_FOUND_RETRY}
+
+# Fetch the items currently in a YouTube Music playlist
+def get_youtube_playlist_items(ytmusic, playlist_id, limiter):
+    return limiter.call(ytmusic.get_playlist, playlist_id, limit=None).get('tracks', [])
+
+# Remove items from a YouTube Music playlist in batches
+def remove_playlist_items(ytmusic, playlist_id, items, limiter, batch_size=INSERT_BATCH_SIZE):
+    removed = 0
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        try:
+            limiter.call(ytmusic.remove_playlist_items, playlist_id, chunk)
+            removed += len(chunk)
         except Exception as e:
-            print(f"× Error: {str(e)}")
-            failed += 1
+            print(f"  × Could not remove {len(chunk)} tracks: {str(e)}")
+    return removed
+
+# Check a playlist against the (index, videoId) items that should be in it, in order. The playlist
+# is read in one bulk paginated request and compared by counting videos in hash maps, so checking
+# thousands of tracks takes a few requests instead of one per track. Items that didn't land are
+# added again and extra copies of a video are removed, both in batches. Videos that weren't meant
+# to be in the playlist at all (e.g. added by hand) are left alone. Returns the indices of the
+# items that are in the playlist afterwards, and what was found and done.
+def reconcile_playlist(ytmusic, playlist_id, items, limiter, batch_size=INSERT_BATCH_SIZE, verbose=True):
+    try:
+        with METRICS.timer("reconcile_read"):
+            present = get_youtube_playlist_items(ytmusic, playlist_id, limiter)
+    except Exception as e:
+        print(f"× Could not read the playlist back to verify it: {str(e)}")
+        return {'present': {index for index, _ in items}, 'missing': 0, 're_added': 0,
+                'duplicates': 0, 'removed': 0, 'unexpected': 0}
+    
+    wanted = Counter(video_id for _, video_id in items)
+    found = Counter()
+    duplicates = []
+    unexpected = 0
+    for item in present:
+        video_id = item.get('videoId')
+        found[video_id] += 1
+        if video_id not in wanted:
+            unexpected += 1
+        elif found[video_id] > wanted[video_id] and item.get('setVideoId'):
+            duplicates.append(item)
+    
+    # The first copies of a video in the playlist account for its first items
+    landed = set()
+    missing = []
+    for index, video_id in items:
+        if found[video_id] > 0:
+            found[video_id] -= 1
+            landed.add(index)
+        else:
+            missing.append((index, video_id))
+    
+    # A video meant to be in the playlist twice has to be allowed in again
+    for start in range(0, len(missing), batch_size):
+        landed.update(insert_chunk(ytmusic, playlist_id, missing[start:start + batch_size], limiter, verbose, duplicates=True))
+    removed = remove_playlist_items(ytmusic, playlist_id, duplicates, limiter, batch_size) if duplicates else 0
+    
+    METRICS.count("reconcile_missing", len(missing))
+    METRICS.count("reconcile_duplicates", len(duplicates))
+    return {'present': landed, 'missing': len(missing), 're_added': len(landed) - (len(items) - len(missing)),
+            'duplicates': len(duplicates), 'removed': removed, 'unexpected': unexpected}
+
+# Bring a mirrored playlist up to date with its Spotify source
+def sync_playlist(ytmusic, token, spotify_playlist, entry, cache=None, prune=False, reorder=False, limiter=None, matcher=None):
+    limiter = limiter or RateController()
+    playlist_id = entry['playlist_id']
+    
+    print(f"\nSyncing '{spotify_playlist['name']}' (last synced {entry.get('synced_at', 'never')})...")
+    tracks = get_playlist_tracks(token, spotify_playlist['id'])
+    
+    # Mirrored tracks are matched by key, counting duplicates, so only the delta is searched for.
+    # Tracks that didn't land last time have no videoId and are tried again; tracks that weren't
+    # found are only searched for again after SYNC_NOT_FOUND_RETRY.
+    mirrored = {}
+    for key, video_id in entry['tracks']:
+        if video_id:
+            mirrored.setdefault(key, []).append(video_id)
+    not_found = recent_not_found(entry)
+    
+    video_ids = []
+    new_tracks = []
+    for index, track in enumerate(tracks):
+        key = track_cache_key(track)
+        known = mirrored.get(key)
+        if known:
+            video_ids.append(known.pop(0))
+        else:
+            video_ids.append(None)
+            if key not in not_found:
+                new_tracks.append(index)
+    
+    removed_count = sum(len(known) for known in mirrored.values())
+    skipped = video_ids.count(None) - len(new_tracks)
+    print(f"✓ {len(new_tracks)} tracks to add (new, or not added last time), {removed_count} removed from Spotify since the last sync")
+    if skipped:
+        print(f"  {skipped} tracks weren't found on YouTube Music recently and aren't searched for again yet")
+    
+    # Search for and add only the new tracks
+    if new_tracks:
+        result = transfer_to_youtube_music(
+            ytmusic, spotify_playlist['name'], [tracks[index] for index in new_tracks],
+            cache=cache, playlist_id=playlist_id, limiter=limiter, matcher=matcher, reconcile=False
+        )
+        for index, (_, video_id) in zip(new_tracks, result['tracks']):
+            video_ids[index] = video_id
+        not_found.update(result['not_found'])
+    
+    if prune or reorder:
+        items = get_youtube_playlist_items(ytmusic, playlist_id, limiter)
+        
+        if prune:
+            # Remove items beyond the number of times each video appears in the Spotify playlist
+            wanted = {}
+            for video_id in video_ids:
+                if video_id:
+                    wanted[video_id] = wanted.get(video_id, 0) + 1
+            
+            keep = []
+            extra = []
+            for item in items:
+                if wanted.get(item['videoId'], 0) > 0:
+                    wanted[item['videoId']] -= 1
+                    keep.append(item)
+                else:
+                    extra.append(item)
+            
+            if extra:
+                removed = remove_playlist_items(ytmusic, playlist_id, extra, limiter)
+                print(f"✓ Removed {removed} tracks that are no longer in the Spotify playlist")
+            items = keep
+        
+        if reorder:
+            # Move items one by one into the Spotify order, skipping those already in place
+            current = [item for item in items if item.get('setVideoId')]
+            desired = []
+            available = {}
+            for item in current:
+                available.setdefault(item['videoId'], []).append(item)
+            for video_id in video_ids:
+                if available.get(video_id):
+                    desired.append(available[video_id].pop(0))
+            
+            moves = 0
+            for position, item in enumerate(desired):
+                if current[position]['setVideoId'] != item['setVideoId']:
+                    limiter.call(ytmusic.edit_playlist, playlist_id, moveItem=(item['setVideoId'], current[position]['setVideoId']))
+                    current.remove(item)
+                    current.insert(position, item)
+                    moves += 1
+            
+            if moves:
+                print(f"✓ Moved {moves} tracks to match the Spotify order")
+    
+    entries = [[track_cache_key(track), video_id] for track, video_id in zip(tracks, video_ids)]
+    missing = {key for key, video_id in entries if not video_id}
+    return entries, {key: at for key, at in not_found.items() if key in missing}
+
+# Sync every mirrored playlist whose Spotify snapshot has changed since the last run
+def sync_playlists(ytmusic, token, playlists, state, cache=None, prune=False, reorder=False, rate_limit=YTMUSIC_RATE_LIMIT, matcher=None):
+    limiter = RateController(rate_limit)
+    matcher = get_matcher(matcher, ytmusic, limiter, cache)
+    by_id = {playlist['id']: playlist for playlist in playlists}
+    synced = 0
+    unchanged = 0
+    
+    for spotify_id, entry in list(state.items()):
+        spotify_playlist = by_id.get(spotify_id)
+        
+        if not spotify_playlist:
+            print(f"\n× '{entry['name']}' is no longer in your Spotify library, skipping")
+            continue
+        
+        # Unchanged playlists are skipped, unless some of their tracks didn't land on YouTube Music
+        # or weren't found longer than SYNC_NOT_FOUND_RETRY ago
+        not_found = recent_not_found(entry)
+        complete = all(video_id or key in not_found for key, video_id in entry['tracks'])
+        if complete and spotify_playlist.get('snapshot_id') and spotify_playlist['snapshot_id'] == entry.get('snapshot_id'):
+            unchanged += 1
+            continue
+        
+        entries, not_found = sync_playlist(ytmusic, token, spotify_playlist, entry, cache, prune, reorder, limiter, matcher)
+        record_sync_state(state, spotify_playlist, entry['playlist_id'], entries, not_found)
+        save_sync_state(state)
+        synced += 1
+    
+    print("-" * 60)
+    print(f"\nSync summary: {synced} playlists updated, {unchanged} unchanged since the last sync")
+    print(f"Matching: {matcher.summary()}")
+    print(f"YouTube Music: {limiter.summary()}")
+    if YTMUSIC_POOL:
+        print(f"Credentials: {YTMUSIC_POOL.summary()}")
+
+# Parse the --playlists argument into the playlists to transfer
+def select_batch_playlists(playlists, selection):
+    if selection.strip().lower() == "all":
+        return playlists
+    
+    by_id = {playlist['id']: playlist for playlist in playlists}
+    selected = []
+    for playlist_id in selection.split(","):
+        playlist_id = playlist_id.strip()
+        if playlist_id in by_id:
+            selected.append(by_id[playlist_id])
+        elif playlist_id:
+            print(f"× Playlist {playlist_id} was not found in your Spotify library, skipping")
+    return selected
+
+# Transfer several playlists non-interactively. Jobs run a few at a time and share one rate
+# budget and one match service, so songs in several playlists are only searched once.
+# Returns the number of playlists that could not be transferred.
+def run_batch(ytmusic, token, playlists, cache=None, resume=False, sync_state=None, concurrency=PLAYLIST_CONCURRENCY, search_concurrency=SEARCH_CONCURRENCY, rate_limit=YTMUSIC_RATE_LIMIT, matcher=None):
+    print(f"\nTransferring {len(playlists)} playlists, {concurrency} at a time...")
+    print("-" * 60)
+    
+    limiter = RateController(rate_limit)
+    matcher = get_matcher(matcher, ytmusic, limiter, cache)
+    start_time = time.monotonic()
+    
+    def job(playlist):
+        try:
+            total, tracks = stream_playlist_tracks(token, playlist['id'])
+            journal = TransferJournal(playlist['id'])
+            return transfer_to_youtube_music(
+                ytmusic, playlist['name'], tracks, total=total, concurrency=search_concurrency, cache=cache,
+                journal=journal, resume=resume, limiter=limiter, matcher=matcher, verbose=False
+            )
+        except (Exception, SystemExit) as e:
+            print(f"[{playlist['name']}] × Transfer failed: {str(e)}")
+            return None
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(job, playlists))
+    
+    elapsed = time.monotonic() - start_time
+    
+    # Per-playlist and aggregate throughput
+    print("-" * 60)
+    print(f"\n{'Playlist':<30} {'Added':>7} {'Failed':>7} {'Time':>8} {'Tracks/s':>9}")
+    total_added = 0
+    total_failed = 0
+    for playlist, result in zip(playlists, results):
+        name = playlist['name'][:30]
+        if not result:
+            print(f"{name:<30} {'-':>7} {'-':>7} {'-':>8} {'-':>9}")
+            continue
+        
+        total_added += result['added']
+        total_failed += result['failed']
+        rate = len(result['tracks']) / result['elapsed'] if result['elapsed'] else 0
+        print(f"{name:<30} {result['added']:>7} {result['failed']:>7} {result['elapsed']:>7.1f}s {rate:>9.1f}")
+        
+        if sync_state is not None:
+            record_sync_state(sync_state, playlist, result['playlist_id'], result['tracks'], result['not_found'])
+    
+    if sync_state is not None:
+        save_sync_state(sync_state)
+    
+    rate = (total_added + total_failed) / elapsed if elapsed else 0
+    print(f"{'Total':<30} {total_added:>7} {total_failed:>7} {elapsed:>7.1f}s {rate:>9.1f}")
+    print(f"\nMatching: {matcher.summary()}")
+    print(f"YouTube Music: {limiter.summary()}")
+    if YTMUSIC_POOL:
+        print(f"Credentials: {YTMUSIC_POOL.summary()}")
+    if cache:
+        print(f"Match cache: {cache.hits} hits, {cache.misses} misses")
+    
+    return sum(1 for result in results if not result)
+
+# Match every track of the playlists without creating or changing anything on YouTube Music,
+# then write a match report and estimate how long adding the matches would take
+def dry_run(ytmusic, token, playlists, cache=None, concurrency=SEARCH_CONCURRENCY, rate_limit=YTMUSIC_RATE_LIMIT, matcher=None, path=MATCH_REPORT_FILE):
+    limiter = RateController(rate_limit)
+    matcher = get_matcher(matcher, ytmusic, limiter, cache)
+    report = {'created': round(time.time()), 'confidence_threshold': MATCH_CONFIDENCE_THRESHOLD, 'playlists': []}
+    start_time = time.monotonic()
+    
+    print(f"\nDry run: matching {len(playlists)} playlists with {concurrency} workers, nothing will be written to YouTube Music")
+    print("-" * 60)
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for playlist in playlists:
+            total, tracks = stream_playlist_tracks(token, playlist['id'])
+            resolve = lambda track: (track, matcher.resolve(track))
+            matches = []
+            unmatched = []
+            
+            for track, match in bounded_map(executor, resolve, tracks, concurrency * 4):
+                entry = {'key': track_cache_key(track), 'name': track['name'], 'artists': track['artists'],
+                         'video_id': match.get('video_id')}
+                if match.get('video_id'):
+                    score = match.get('score') or 0
+                    entry.update(title=match.get('title'), artist=match.get('artist'), score=score,
+                                 alternate=match.get('alternate', False), confident=score >= MATCH_CONFIDENCE_THRESHOLD)
+                else:
+                    if match.get('error'):
+                        entry['error'] = match['error']
+                    unmatched.append({'name': track['name'], 'artists': track['artists'], 'error': match.get('error')})
+                matches.append(entry)
             
-            # If we encounter too many errors in a row, pause to avoid triggering rate limits
-            if failed > 5 and failed % 5 == 0:
-                pause_time = 30
-                print(f"\nToo many errors, pausing for {pause_time} seconds to avoid rate limits...")
-                time.sleep(pause_time)
+            matched = len(matches) - len(unmatched)
+            confident = sum(1 for entry in matches if entry.get('confident'))
+            report['playlists'].append({
+                'id': playlist['id'], 'name': playlist['name'], 'snapshot_id': playlist.get('snapshot_id'),
+                'tracks': len(matches), 'matched': matched, 'confident': confident,
+                'unmatched': unmatched, 'matches': matches
+            })
+            rate = matched / len(matches) * 100 if matches else 0
+            print(f"{playlist['name'][:30]:<30} {matched:>6}/{len(matches):<6} matched ({rate:.0f}%), {confident} confident")
+    
+    # The write phase is one request to create each playlist and one per batch of matched tracks,
+    # sent one after another, each taking the measured request latency or the rate limit's spacing
+    searches = METRICS.snapshot()['stages'].get('ytmusic_search')
+    latency = searches['seconds'] / searches['count'] if searches else 0
+    writes = sum(1 + -(-playlist['matched'] // INSERT_BATCH_SIZE) for playlist in report['playlists'])
+    report['estimate'] = {
+        'write_requests': writes,
+        'request_seconds': round(latency, 3),
+        'rate': round(limiter.rate, 3),
+        'write_seconds': round(writes * max(latency, 1 / limiter.rate), 1),
+        'match_seconds': round(time.monotonic() - start_time, 1)
+    }
+    
+    with open(path + ".tmp", "w") as f:
+        json.dump(report, f, indent=1)
+    os.replace(path + ".tmp", path)
     
+    total = sum(playlist['tracks'] for playlist in report['playlists'])
+    matched = sum(playlist['matched'] for playlist in report['playlists'])
+    confident = sum(playlist['confident'] for playlist in report['playlists'])
     print("-" * 60)
-    print(f"\nTransfer summary: {success}/{total} tracks added, {failed} failed")
-    print(f"\nYour new playlist is ready! You can access it in YouTube Music.")
+    print(f"\nMatched {matched}/{total} tracks ({matched / total * 100 if total else 0:.1f}%), {confident} with a score of at least {MATCH_CONFIDENCE_THRESHOLD}")
+    print(f"Matching took {report['estimate']['match_seconds']}s ({matcher.summary()})")
+    print(f"Adding them would take about {report['estimate']['write_seconds']}s ({writes} requests)")
+    print(f"✓ Match report written to {path}")
+    print(f"Run again with --match-report {path} to transfer using these matches without searching again")
+
+# Persistent queue of transfer jobs, shared by the job server and its worker processes
+class JobQueue:
+    FIELDS = ('id', 'playlist_id', 'snapshot', 'status', 'name', 'total', 'added', 'failed', 'playlist',
+              'error', 'attempts', 'worker', 'created', 'started', 'finished')
+
+    def __init__(self, path=JOB_QUEUE_FILE):
+        import sqlite3
+        self.lock = threading.Lock()
+        # Autocommit, with explicit transactions where a job is claimed
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, playlist_id TEXT NOT NULL, snapshot TEXT, status TEXT NOT NULL, "
+            "name TEXT, total INTEGER, added INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0, "
+            "playlist TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, worker INTEGER, "
+            "created REAL NOT NULL, started REAL, finished REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+
+    def submit(self, playlist_id, snapshot=None):
+        with self.lock:
+            cursor = self.db.execute("INSERT INTO jobs (playlist_id, snapshot, status, created) VALUES (?, ?, 'queued', ?)",
+                                     (playlist_id, snapshot, time.time()))
+            return cursor.lastrowid
+
+    def claim(self, worker):
+        # Take the oldest queued job; the write lock keeps two workers from claiming the same one.
+        # Jobs for a playlist that another job is transferring wait for it, since both would use
+        # the same transfer journal.
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND playlist_id NOT IN "
+                    "(SELECT playlist_id FROM jobs WHERE status = 'running') ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row:
+                    self.db.execute("UPDATE jobs SET status = 'running', worker = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+                                    (worker, time.time(), row[0]))
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row else None
+
+    def update(self, job_id, **fields):
+        with self.lock:
+            self.db.execute(f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                            list(fields.values()) + [job_id])
+
+    def requeue_interrupted(self):
+        # Jobs left running by a server that stopped; they resume from their transfer journal
+        with self.lock:
+            return self.db.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.db.execute(f"SELECT {', '.join(self.FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self.describe(row) if row else None
+
+    def list(self, status=None, limit=100):
+        query = f"SELECT {', '.join(self.FIELDS)} FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        with self.lock:
+            rows = self.db.execute(query + " ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+        return [self.describe(row) for row in rows]
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            added, failed, seconds = self.db.execute(
+                "SELECT COALESCE(SUM(added), 0), COALESCE(SUM(failed), 0), COALESCE(SUM(finished - started), 0) "
+                "FROM jobs WHERE status = 'done'"
+            ).fetchone()
+        return {'jobs': counts, 'tracks_added': added, 'tracks_failed': failed,
+                'tracks_per_second_per_worker': round((added + failed) / seconds, 2) if seconds else None}
+
+    def describe(self, row):
+        job = dict(zip(self.FIELDS, row))
+        done = job['added'] + job['failed']
+        job['progress'] = round(done / job['total'], 3) if job['total'] else None
+        return job
+
+# Run one job in a worker: fetch the playlist from Spotify (or the job's snapshot) and transfer it
+def run_job(job, ytmusic, token, cache, limiter, matcher, queue, sync_lock, options):
+    source = SpotifySnapshot(job['snapshot']) if job['snapshot'] else token
+    if source is None:
+        raise Exception("no saved Spotify credentials, restart the job server to log in")
+    
+    if job['snapshot']:
+        playlist = next((playlist for playlist in source.playlists if playlist['id'] == job['playlist_id']), None)
+        if not playlist:
+            raise Exception(f"playlist {job['playlist_id']} is not in the snapshot")
+    else:
+        playlist = spotify_get(token, f"{SPOTIFY_API_URL}/playlists/{job['playlist_id']}", {'fields': 'id,name,snapshot_id'})
+    
+    total, tracks = stream_playlist_tracks(source, playlist['id'])
+    queue.update(job['id'], name=playlist['name'], total=total)
+    
+    # A job that was interrupted before continues from its last checkpoint
+    result = transfer_to_youtube_music(
+        ytmusic, playlist['name'], tracks, total=total, concurrency=options['concurrency'], cache=cache,
+        journal=TransferJournal(playlist['id']), resume=job['attempts'] > 1, limiter=limiter, matcher=matcher,
+        verbose=False, progress=lambda added, failed: queue.update(job['id'], added=added, failed=failed)
+    )
+    if not result:
+        raise Exception("could not create the YouTube Music playlist")
+    
+    # Workers share sync_state.json, so they take turns updating it
+    with sync_lock:
+        state = load_sync_state()
+        record_sync_state(state, playlist, result['playlist_id'], result['tracks'], result['not_found'])
+        save_sync_state(state)
+    
+    return result
+
+# Worker process of the job server. Keeps a warm YouTube Music client, Spotify session, rate
+# controller and match cache, and runs queued jobs one at a time until the server stops.
+def job_worker(number, options, sync_lock, stop):
+    global YTMUSIC_POOL, CATALOG_INDEX
+    
+    try:
+        ytmusic = setup_youtube_music(options['concurrency'])
+        token = SpotifyCredentials.load()
+        cache = None if options['no_cache'] or options['match_service'] else MatchCache()
+        if cache:
+            CATALOG_INDEX = CatalogIndex()
+        # The workers use the same YouTube Music account(s), so they split its rate limits between them
+        share = 1 / options['workers']
+        limiter = RateController(options['rate'] * share, min_rate=YTMUSIC_MIN_RATE * share, max_rate=YTMUSIC_MAX_RATE * share)
+        if options['credentials']:
+            YTMUSIC_POOL = CredentialPool(options['credentials'], options['concurrency'], options['rate'], share)
+        matcher = get_matcher(RemoteMatchService(options['match_service']) if options['match_service'] else None, ytmusic, limiter, cache)
+        queue = JobQueue()
+        print(f"[worker {number}] Ready")
+        
+        while not stop.is_set():
+            job = queue.claim(number)
+            if not job:
+                stop.wait(JOB_POLL_INTERVAL)
+                continue
+            
+            print(f"[worker {number}] Starting job {job['id']} (playlist {job['playlist_id']})")
+            try:
+                result = run_job(job, ytmusic, token, cache, limiter, matcher, queue, sync_lock, options)
+                queue.update(job['id'], status='done', playlist=result['playlist_id'], added=result['added'],
+                             failed=result['failed'], finished=time.time())
+                print(f"[worker {number}] Job {job['id']} done: {result['added']} added, {result['failed']} failed in {result['elapsed']:.1f}s")
+            except (Exception, SystemExit) as e:
+                queue.update(job['id'], status='failed', error=str(e), finished=time.time())
+                print(f"[worker {number}] × Job {job['id']} failed: {str(e)}")
+    except KeyboardInterrupt:
+        # The server is shutting down; an unfinished job is requeued when it starts again
+        pass
+
+# Run the job server: an HTTP API on localhost to submit and follow transfers, and a pool of
+# worker processes that run them. Jobs are kept in JOB_QUEUE_FILE, so they survive restarts.
+def serve_jobs(args, port=JOB_SERVER_PORT, workers=JOB_WORKERS):
+    import http.server
+    import multiprocessing
+    
+    queue = JobQueue()
+    requeued = queue.requeue_interrupted()
+    if requeued:
+        print(f"\nRequeued {requeued} jobs interrupted by the last shutdown")
+    
+    options = {'concurrency': args.concurrency, 'rate': args.rate, 'no_cache': args.no_cache,
+               'match_service': args.match_service, 'credentials': args.credentials, 'workers': workers}
+    stop = multiprocessing.Event()
+    sync_lock = multiprocessing.Lock()
+    processes = [multiprocessing.Process(target=job_worker, args=(number + 1, options, sync_lock, stop), daemon=True)
+                 for number in range(workers)]
+    for process in processes:
+        process.start()
+    
+    # POST /jobs {"playlist_id": ..., "snapshot": optional file}; GET /jobs[?status=...]; GET /jobs/<id>; GET /stats
+    class JobHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                return self.reply(404, {'error': 'not found'})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                playlist_id = body['playlist_id']
+            except (ValueError, KeyError, TypeError):
+                return self.reply(400, {'error': 'expected {"playlist_id": "...", "snapshot": optional path}'})
+            if body.get('snapshot') and not os.path.exists(body['snapshot']):
+                return self.reply(400, {'error': f"snapshot {body['snapshot']} not found"})
+            self.reply(201, queue.get(queue.submit(playlist_id, body.get('snapshot'))))
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            if path == "/stats":
+                stats = queue.stats()
+                stats['workers'] = sum(1 for process in processes if process.is_alive())
+                return self.reply(200, stats)
+            if path == "/jobs":
+                status = dict(pair.partition("=")[::2] for pair in query.split("&") if pair).get('status')
+                return self.reply(200, queue.list(status))
+            if path.startswith("/jobs/") and path[len("/jobs/"):].isdigit():
+                job = queue.get(int(path[len("/jobs/"):]))
+                return self.reply(200, job) if job else self.reply(404, {'error': 'no such job'})
+            self.reply(404, {'error': 'not found'})
+
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Suppress server logs
+            return
+    
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), JobHandler)
+    server.daemon_threads = True
+    print(f"\nJob server listening on http://127.0.0.1:{port} with {workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        for process in processes:
+            process.join(timeout=10)
+        print(f"Job server: {queue.stats()}")
 
 # Main execution
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transfer a Spotify playlist to YouTube Music")
+    parser.add_argument("--no-cache", action="store_true", help="search for every track instead of reusing matches and songs seen in previous runs")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted transfer of the selected playlist from its last checkpoint")
+    parser.add_argument("--sync", action="store_true", help="update every previously transferred playlist with the tracks added on Spotify since the last run")
+    parser.add_argument("--prune", action="store_true", help="with --sync, also remove tracks that were removed on Spotify")
+    parser.add_argument("--reorder", action="store_true", help="with --sync, also move tracks into the Spotify order")
+    parser.add_argument("--playlists", metavar="IDS", help="transfer these comma-separated Spotify playlist IDs (or 'all') without prompting")
+    parser.add_argument("--concurrency", type=int, default=SEARCH_CONCURRENCY, help=f"number of parallel searches (default: {SEARCH_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=YTMUSIC_RATE_LIMIT, help=f"starting YouTube Music requests per second (default: {YTMUSIC_RATE_LIMIT:g})")
+    parser.add_argument("--serve-matches", action="store_true", help="run a local match service that other transfers can share (see --match-service)")
+    parser.add_argument("--match-service", metavar="URL", help=f"resolve tracks through a running match service, e.g. http://127.0.0.1:{MATCH_SERVICE_PORT}")
+    parser.add_argument("--serve-jobs", action="store_true", help="run a job server that transfers playlists submitted over HTTP in worker processes")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help=f"worker processes for --serve-jobs (default: {JOB_WORKERS})")
+    parser.add_argument("--port", type=int, help=f"port for --serve-matches (default: {MATCH_SERVICE_PORT}) or --serve-jobs (default: {JOB_SERVER_PORT})")
+    parser.add_argument("--export-snapshot", metavar="FILE", help="save the playlists selected with --playlists (default: all) and their tracks to FILE, then exit")
+    parser.add_argument("--from-snapshot", metavar="FILE", help="read playlists and tracks from a file saved with --export-snapshot instead of Spotify")
+    parser.add_argument("--dry-run", action="store_true", help="only match the tracks and write a match report, without creating playlists")
+    parser.add_argument("--match-report", metavar="FILE", help=f"with --dry-run, where to write the report (default: {MATCH_REPORT_FILE}); otherwise, use the matches in FILE instead of searching again")
+    parser.add_argument("--credentials", metavar="FILE", nargs="+", help="spread searches over these YouTube Music credentials files (e.g. made with youtube_auth_helper.py --output); playlists are still written with headers_auth.json")
+    parser.add_argument("--login", action="store_true", help="ignore saved Spotify credentials and log in through the browser again")
+    parser.add_argument("--metrics-log", metavar="FILE", help="append a JSON line per timed request and a final summary to FILE")
+    parser.add_argument("--metrics-prom", metavar="FILE", help="write stage timings and counters to FILE in Prometheus text format")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Spotify to YouTube Music Playlist Transfer")
+    print("=" * 60)
+    
+    if args.metrics_log:
+        METRICS.open_log(args.metrics_log)
+    
     try:
-        # Authenticate with Spotify
-        print("\nAuthenticating with Spotify...")
-        auth_code = get_spotify_auth_code()
-        spotify_token = get_spotify_token(auth_code)
-        print("✓ Successfully authenticated with Spotify!")
-        
-        # Get user's Spotify playlists
-        playlists = get_spotify_playlists(spotify_token)
+        # The match service only needs YouTube Music
+        if args.serve_matches:
+            ytmusic = setup_youtube_music(args.concurrency)
+            cache = None if args.no_cache else MatchCache()
+            if cache:
+                CATALOG_INDEX = CatalogIndex()
+            if args.credentials:
+                YTMUSIC_POOL = CredentialPool(args.credentials, args.concurrency, args.rate)
+            serve_match_service(get_matcher(None, ytmusic, RateController(args.rate), cache), args.port or MATCH_SERVICE_PORT)
+            sys.exit(0)
+        
+        matcher = RemoteMatchService(args.match_service) if args.match_service else None
+        
+        if args.serve_jobs:
+            # Log in once up front; the workers reuse the saved Spotify credentials
+            print("\nAuthenticating with Spotify...")
+            get_spotify_credentials(args.login)
+            print("✓ Successfully authenticated with Spotify!")
+            serve_jobs(args, args.port or JOB_SERVER_PORT, args.workers)
+            sys.exit(0)
+        
+        if args.from_snapshot:
+            # Replay a previous fetch, without contacting Spotify at all
+            spotify_token = SpotifySnapshot(args.from_snapshot)
+            playlists = spotify_token.playlists
+            print(f"\n✓ Loaded {len(playlists)} playlists from snapshot {args.from_snapshot}")
+        else:
+            # Authenticate with Spotify
+            print("\nAuthenticating with Spotify...")
+            spotify_token = get_spotify_credentials(args.login)
+            print("✓ Successfully authenticated with Spotify!")
+            
+            # Get user's Spotify playlists
+            playlists = get_spotify_playlists(spotify_token)
+        
+        if args.match_report and not args.dry_run:
+            matcher = ReportMatcher(args.match_report, matcher)
+        
+        if args.export_snapshot:
+            export_snapshot(spotify_token, select_batch_playlists(playlists, args.playlists or "all"), args.export_snapshot)
+            sys.exit(0)
+        
+        # Searches go to the credential pool, writes to the account in headers_auth.json
+        if args.credentials:
+            YTMUSIC_POOL = CredentialPool(args.credentials, args.concurrency, args.rate)
+        
+        # A shared match service keeps its own match cache and catalog index
+        cache = None if args.no_cache or args.match_service else MatchCache()
+        if cache:
+            CATALOG_INDEX = CatalogIndex()
+        sync_state = load_sync_state()
+        
+        if args.dry_run:
+            if args.playlists:
+                selected = select_batch_playlists(playlists, args.playlists)
+            else:
+                display_playlists(playlists)
+                selected = [select_playlist(playlists)]
+            
+            ytmusic = setup_youtube_music(args.concurrency)
+            dry_run(ytmusic, spotify_token, selected, cache, args.concurrency, args.rate, matcher, args.match_report or MATCH_REPORT_FILE)
+            sys.exit(0)
+        
+        if args.sync:
+            if not sync_state:
+                print("\nNo transferred playlists to sync yet. Transfer a playlist first.")
+                sys.exit(0)
+            
+            ytmusic = setup_youtube_music(args.concurrency)
+            sync_playlists(ytmusic, spotify_token, playlists, sync_state, cache, args.prune, args.reorder, args.rate, matcher)
+            print("\nSync completed!")
+            sys.exit(0)
+        
+        if args.playlists:
+            selected = select_batch_playlists(playlists, args.playlists)
+            if not selected:
+                print("\nNo playlists to transfer")
+                sys.exit(1)
+            
+            ytmusic = setup_youtube_music(args.concurrency)
+            failed = run_batch(ytmusic, spotify_token, selected, cache, args.resume, sync_state,
+                               search_concurrency=args.concurrency, rate_limit=args.rate, matcher=matcher)
+            if failed:
+                print(f"\n× {failed} of {len(selected)} playlists could not be transferred")
+                sys.exit(1)
+            print("\nTransfer completed!")
+            sys.exit(0)
+        
         display_playlists(playlists)
         
         # Let user select a playlist
         selected_playlist = select_playlist(playlists)
         
-        # Get tracks from the selected playlist
-        tracks = get_playlist_tracks(spotify_token, selected_playlist['id'])
-        
         # Authenticate with YouTube Music
-        ytmusic = setup_youtube_music()
+        ytmusic = setup_youtube_music(args.concurrency)
+        
+        # Stream tracks from the selected playlist, so matching starts as soon as the first page arrives
+        total, tracks = stream_playlist_tracks(spotify_token, selected_playlist['id'])
         
         # Create YouTube Music playlist and add tracks
-        transfer_to_youtube_music(ytmusic, selected_playlist['name'], tracks)
+        journal = TransferJournal(selected_playlist['id'])
+        if args.resume and not journal.exists():
+            print("\nNo interrupted transfer found for this playlist, starting a new one")
+        elif not args.resume and journal.exists():
+            print("\nNote: discarding the checkpoint of an interrupted transfer of this playlist (use --resume to continue it instead)")
+        result = transfer_to_youtube_music(ytmusic, selected_playlist['name'], tracks, total=total, concurrency=args.concurrency,
+                                           rate_limit=args.rate, cache=cache, journal=journal, resume=args.resume, matcher=matcher)
+        
+        # Remember the transfer so later runs with --sync only add what changed
+        if result:
+            record_sync_state(sync_state, selected_playlist, result['playlist_id'], result['tracks'], result['not_found'])
+            save_sync_state(sync_state)
         
         print("\nTransfer completed!")
         print("\nThanks for using the Spotify to YouTube Music Playlist Transfer tool!")
@@ -340,4 +2700,10 @@ if __name__ == "__main__":
         sys.exit(0)
     except Exception as e:
         print(f"\nUnexpected error: {str(e)}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        # Where the time went, also on failure or cancellation
+        METRICS.print_summary()
+        METRICS.close()
+        if args.metrics_prom:
+            METRICS.write_prometheus(args.metrics_prom)
\ No newline at end of file
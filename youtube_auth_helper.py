@@ -2,20 +2,20 @@ import os
 import sys
 import json
 import time
+import argparse
+import importlib.util
 
-# Check for ytmusicapi
-try:
-    from ytmusicapi import YTMusic
-except ImportError:
-    print("Error: ytmusicapi is not installed. Install it using: pip install ytmusicapi")
-    sys.exit(1)
-
-print("=" * 60)
-print("YouTube Music Authentication Helper")
-print("=" * 60)
+def load_ytmusic():
+    """Import ytmusicapi when it is first needed, exiting with install instructions if it's missing."""
+    try:
+        from ytmusicapi import YTMusic
+    except ImportError:
+        print("Error: ytmusicapi is not installed. Install it using: pip install ytmusicapi")
+        sys.exit(1)
+    return YTMusic
 
-def create_headers_file():
-    """Create a headers_auth.json file with the required fields."""
+def create_headers_file(path="headers_auth.json"):
+    """Create a headers file with the required fields at the given path."""
     print("\nCreating an authentication file for YouTube Music...")
     
     # Get required cookie values
@@ -56,18 +56,20 @@ def create_headers_file():
     }
     
     # Save to file
-    with open("headers_auth.json", "w") as f:
+    with open(path, "w") as f:
         json.dump(headers, f, indent=2)
     
-    print("\n✓ Headers saved to headers_auth.json")
+    print(f"\n✓ Headers saved to {path}")
     return True
 
-def test_auth():
+def test_auth(path="headers_auth.json"):
     """Test if the authentication file works for both read and write operations."""
     print("\nTesting authentication...")
     
+    YTMusic = load_ytmusic()
+    
     try:
-        ytmusic = YTMusic("headers_auth.json")
+        ytmusic = YTMusic(path)
         
         # Test 1: Basic search (read operation)
         print("\nTest 1: Basic search...")
@@ -112,23 +114,36 @@ def test_auth():
 
 def main():
     """Main function to handle YouTube Music authentication."""
+    parser = argparse.ArgumentParser(description="Set up a YouTube Music authentication file")
+    parser.add_argument("--output", default="headers_auth.json",
+                        help="File to write (default: headers_auth.json); use one file per account for --credentials")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("YouTube Music Authentication Helper")
+    print("=" * 60)
+    
+    # Fail before asking for cookies, without paying for the import yet
+    if importlib.util.find_spec("ytmusicapi") is None:
+        print("Error: ytmusicapi is not installed. Install it using: pip install ytmusicapi")
+        sys.exit(1)
     
     print("\nThis script will help you set up authentication for YouTube Music.")
     
     # Check for existing auth file
-    if os.path.exists("headers_auth.json"):
-        print("\nFound existing authentication file: headers_auth.json")
+    if os.path.exists(args.output):
+        print(f"\nFound existing authentication file: {args.output}")
         print("Testing if it works...")
         
-        if test_auth():
+        if test_auth(args.output):
             print("\n✓ Existing authentication is working! You can now run the main script.")
             return
         else:
             print("\n× Existing authentication doesn't work. Let's create a new one.")
     
     # Create and test new auth file
-    if create_headers_file():
-        if test_auth():
+    if create_headers_file(args.output):
+        if test_auth(args.output):
             print("\n✓ Authentication is working! You can now run the main script.")
             return
         else: